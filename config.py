@@ -1,6 +1,4 @@
 # config.py - Configuration settings
-import os
-from pathlib import Path
 
 class Config:
     def __init__(self):
@@ -10,23 +8,34 @@ class Config:
             "model": "claude-sonnet-4-20250514",
             "api_key": "ADD YOUR API KEY HERE",
             "max_tokens": 1000,
-            "temperature": 0.7
+            "temperature": 0.7,
+            "batch_size": 25  # Max turns stacked into one batched LLM request
         }
         
         # File paths
         self.excel_file = "middleware_memory.xlsx"
         self.log_file = "middleware_log.txt"
         self.debug_file = "debug_log.xlsx"
+        self.sqlite_file = "middleware_memory.db"
+        
+        # Memory storage: "excel" (human-readable workbook) or "sqlite" (faster, append-only log)
+        self.memory_backend = "excel"
         
         # System parameters
         self.boredom_threshold = 0.3
         self.topic_change_threshold = 5
         self.engagement_decay_rate = 0.1
         
-        # Create data directory if it doesn't exist
-        Path("data").mkdir(exist_ok=True)
+        # Data files live under data/ (created lazily on first write, see MemoryManager)
         self.excel_file = f"data/{self.excel_file}"
         self.debug_file = f"data/{self.debug_file}"
+        self.sqlite_file = f"data/{self.sqlite_file}"
+        
+        # Raw-LLM comparison: one extra raw-mode call every N turns (1 = every turn, 0 = off)
+        self.raw_compare_every = 1
+        
+        # Console pacing: minimum seconds per turn, fast replies are padded up to it (0 = off)
+        self.ui_pad_seconds = 0.0
         
         # Debug settings
         self.debug_enabled = True
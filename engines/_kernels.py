@@ -0,0 +1,100 @@
+# engines/_kernels.py - Numeric mood-update kernel (Numba-compiled when available)
+import math
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in so the kernels run as plain Python without numba"""
+        def wrap(fn):
+            return fn
+        return wrap
+
+
+@njit(cache=True)
+def _engagement_bin(engagement):
+    """Number of emotion-ladder engagement cuts (0.2 ... 0.8) strictly exceeded"""
+    bin_index = 0
+    for cut in (0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8):
+        if engagement > cut:
+            bin_index += 1
+    return bin_index
+
+
+@njit(cache=True)
+def _energy_bin(energy):
+    """Energy class for the emotion ladder: <0.3, <0.4, <=0.5, <=0.7, >0.7"""
+    if energy < 0.3:
+        return 0
+    elif energy < 0.4:
+        return 1
+    elif energy <= 0.5:
+        return 2
+    elif energy <= 0.7:
+        return 3
+    return 4
+
+
+@njit(cache=True)
+def _clamp(x, lo, hi):
+    """Same as max(lo, min(hi, x)) for lo <= hi, without the builtin calls"""
+    return lo if x < lo else hi if x > hi else x
+
+
+@njit(cache=True)
+def _apply_spec(value, spec, intensity):
+    """clamp(base + coef * intensity, floor, cap); a NaN base leaves the value as is"""
+    if math.isnan(spec[0]):
+        return value
+    return _clamp(spec[0] + intensity * spec[1], spec[2], spec[3])
+
+
+@njit(cache=True)
+def update_mood_kernel(engagement, energy, curiosity, msg_engagement, has_question,
+                       trigger_id, intensity, shift_table, emotion_lut, no_trigger):
+    """Pure numeric part of EmotionalEngine.update_mood_from_input
+
+    shift_table[trigger_id] holds (engagement, energy, curiosity) specs for a trigger,
+    emotion_lut[engagement_bin][energy_bin] the resulting emotion id.
+
+    Returns:
+        tuple: (engagement, energy, curiosity, emotion_id)
+    """
+    # AMPLIFIED REACTIONS but with more variety
+    if trigger_id != no_trigger:
+        row = shift_table[trigger_id]
+        engagement = _apply_spec(engagement, row[0], intensity)
+        energy = _apply_spec(energy, row[1], intensity)
+        curiosity = _apply_spec(curiosity, row[2], intensity)
+    else:
+        # Normal processing with amplification but more nuanced
+        new_engagement = 0.5 * engagement + 0.5 * msg_engagement
+
+        # AMPLIFY the change but allow for downward movement
+        change = new_engagement - engagement
+        amplified_change = change * 2.0  # Reduced from 2.5 for more stability
+        engagement = _clamp(engagement + amplified_change, 0.1, 0.9)
+
+    # Update energy with more variety (can go down too)
+    if msg_engagement > 0.7:
+        energy = min(0.9, energy + 0.15)
+    elif msg_engagement < 0.3:
+        energy = max(0.1, energy - 0.15)
+    elif msg_engagement < 0.4:
+        # Slight energy decrease for mild disengagement
+        energy = max(0.2, energy - 0.05)
+
+    # Map emotions based on both engagement AND energy (precomputed table)
+    emotion_id = emotion_lut[_engagement_bin(engagement)][_energy_bin(energy)]
+
+    # Update curiosity more gradually
+    if has_question:
+        curiosity = min(0.9, curiosity + 0.1)
+    else:
+        # Slight curiosity decay over time
+        curiosity = max(0.3, curiosity - 0.02)
+
+    return engagement, energy, curiosity, emotion_id
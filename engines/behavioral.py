@@ -1,12 +1,133 @@
 # engines/behavioral.py - V3 with less prescriptive, more inspirational guidance
+from collections import OrderedDict, deque
 from datetime import datetime, timedelta
-import random
+from enum import IntEnum
+from functools import lru_cache
+import sys
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+# Integer codes for score_grid_boredom (every other emotion encodes as 0)
+EMOTION_CODES = {'bored': 1, 'tired': 2}
+
+# Emotion groups used in membership checks
+_BORED_TIRED = frozenset(('bored', 'tired'))
+_CONTEMPLATIVE = frozenset(('contemplative', 'reflective'))
+_EXCITED = frozenset(('excited',))
+
+class Mode(IntEnum):
+    """Behavioral modes - use mode_name() for the string form at API/log boundaries"""
+    CONTEMPLATIVE = 0
+    LOW_ENERGY = 1
+    ENERGETIC = 2
+    ENGAGED = 3
+    DISENGAGED = 4
+    BALANCED = 5
+
+_MODE_NAMES = ('contemplative', 'low_energy', 'energetic', 'engaged', 'disengaged', 'balanced')
+_MODE_BY_NAME = {name: Mode(i) for i, name in enumerate(_MODE_NAMES)}
+
+def mode_name(mode):
+    """String name for a Mode (strings pass through unchanged)"""
+    return mode if isinstance(mode, str) else _MODE_NAMES[mode]
+
+def _as_mode(mode):
+    """Accept either a Mode or its legacy string name"""
+    if isinstance(mode, str):
+        return _MODE_BY_NAME.get(mode, Mode.BALANCED)
+    return mode
+
+def _tokens(*names):
+    """Interned token tuple - every call site shares the same string objects"""
+    return tuple(sys.intern(name) for name in names)
+
+# Lookup tables for mode/initiative driven guidance, indexed by Mode
+_MODE_GUIDANCE = (
+    _tokens('MOOD_CONTEMPLATIVE'),  # CONTEMPLATIVE - let Claude interpret this
+    _tokens('MOOD_LOW_ENERGY'),     # LOW_ENERGY
+    _tokens('MOOD_ENERGETIC'),      # ENERGETIC
+    (),                             # ENGAGED
+    _tokens('ENGAGEMENT_LOW'),      # DISENGAGED
+    ()                              # BALANCED
+)
+
+_INITIATIVE_GUIDANCE = {
+    'strong': sys.intern('TAKE_INITIATIVE'),  # Generic, let Claude decide how
+    'moderate': sys.intern('SHOW_INTEREST'),
+    'gentle': sys.intern('BE_CURIOUS')
+}
+
+# Situation guidance tokens
+_G_TOPIC_STALE = sys.intern('TOPIC_STALE')
+_G_CONVERSATION_STAGNANT = sys.intern('CONVERSATION_STAGNANT')
+_G_BREAK_PATTERN = sys.intern('BREAK_PATTERN')
+
+_MODE_ACTIONS = (
+    _tokens('thoughtful_question', 'deeper_exploration'),   # CONTEMPLATIVE
+    _tokens('gentle_nudge', 'quiet_interest'),              # LOW_ENERGY
+    _tokens('enthusiastic_response', 'dynamic_question'),   # ENERGETIC
+    (),                                                     # ENGAGED
+    (),                                                     # DISENGAGED
+    ()                                                      # BALANCED
+)
+
+# Situation action tokens
+_REFRESH_ACTIONS = _tokens('refresh_conversation', 'new_perspective')
+_SPARK_ACTIONS = _tokens('spark_interest', 'find_connection')
+
+# Emotions that decide the behavioral mode on their own
+_EMOTION_TO_MODE = {
+    'contemplative': Mode.CONTEMPLATIVE,
+    'reflective': Mode.CONTEMPLATIVE,
+    'thoughtful': Mode.CONTEMPLATIVE,
+    'tired': Mode.LOW_ENERGY
+}
+
+def _threshold_bin(level):
+    """Bucket a 0-1 level by the mode thresholds: 0 = below 0.3, 2 = above 0.7, 1 = between"""
+    if level < 0.3:
+        return 0
+    return 2 if level > 0.7 else 1
+
+@lru_cache(maxsize=4096)
+def _mode(emotion, energy_bin, engagement_bin):
+    """Behavioral mode for a discretized state (pure, so memoized)"""
+    mode = _EMOTION_TO_MODE.get(emotion)
+    if mode is not None:  # Mode.CONTEMPLATIVE is 0, so test identity
+        return mode
+    elif energy_bin == 0:
+        return Mode.LOW_ENERGY
+    elif emotion in _EXCITED and energy_bin == 2:
+        return Mode.ENERGETIC
+    elif engagement_bin == 2:
+        return Mode.ENGAGED
+    elif engagement_bin == 0:
+        return Mode.DISENGAGED
+    else:
+        return Mode.BALANCED
 
 class BehavioralEngine:
+    # Fixed attribute set - no per-instance __dict__ (one engine per session)
+    __slots__ = ('conversation_topics', 'topic_performance', '_topic_perf_cap',
+                 'initiative_history', 'current_topic', 'topic_start_time',
+                 'messages_on_topic', 'behavioral_params', 'initiative_suggestions',
+                 '_tcf', '_tcf_x15', '_curiosity_counter', '_curiosity_period',
+                 '_recent_window', '_recent_taken', '_recent_success')
+    
     def __init__(self):
         self.conversation_topics = []
-        self.topic_performance = {}
-        self.initiative_history = []
+        self.topic_performance = OrderedDict()  # LRU-capped at _topic_perf_cap entries
+        self._topic_perf_cap = 128
+        self.initiative_history = deque(maxlen=20)  # Bounded: oldest entries drop off
+        
+        # Running counts over the last 5 outcomes: (initiative_taken, success) pairs
+        self._recent_window = deque(maxlen=5)
+        self._recent_taken = 0
+        self._recent_success = 0
         self.current_topic = None
         self.topic_start_time = datetime.now()
         self.messages_on_topic = 0
@@ -19,6 +140,8 @@ class BehavioralEngine:
             'empathy_response': 0.6,       # Maintained
             'boredom_tolerance': 0.4       # Slightly higher tolerance
         }
+        self._curiosity_counter = 0
+        self._refresh_derived()
         
         # Less prescriptive action categories - more like suggestions
         self.initiative_suggestions = {
@@ -33,29 +156,59 @@ class BehavioralEngine:
             ]
         }
     
-    def analyze_conversation_state(self, recent_messages, emotional_state):
+    def analyze_conversation_state(self, recent_messages, emotional_state, now=None):
         """Enhanced analysis with less aggressive triggers"""
+        return self._analyze_state(recent_messages, emotional_state, now)[0]
+    
+    def evaluate(self, recent_messages, emotional_state, now=None):
+        """Analyze state and build guidance + actions in one pass
+        
+        Equivalent to analyze_conversation_state followed by get_initiative_guidance
+        and suggest_conversation_actions, but the initiative triggers are used directly
+        instead of being looked up from the returned context.
+        
+        Returns:
+            tuple: (context, guidance, actions)
+        """
+        context, triggers = self._analyze_state(recent_messages, emotional_state, now)
+        behavioral_mode = context['behavioral_mode']
+        
+        guidance = self._build_guidance(
+            context['initiative_type'], behavioral_mode, triggers, context['pattern_break_needed']
+        )
+        actions = self._build_actions(behavioral_mode, context['boredom_level'], context['avg_engagement'])
+        return context, guidance, actions
+    
+    def _analyze_state(self, recent_messages, emotional_state, now):
+        """Shared analysis body: returns (context, initiative triggers)"""
+        if now is None:
+            now = datetime.now()
         
         # Update message count for current topic
         if recent_messages:
             self.messages_on_topic += 1
         
-        # Calculate engagement
-        avg_engagement = emotional_state.get('engagement_level', 0.5)
+        # Read each emotional key once and pass the values down
+        es_get = emotional_state.get
+        avg_engagement = es_get('engagement_level', 0.5)
+        energy = es_get('energy_level', 0.5)
+        primary_emotion = es_get('primary_emotion', 'neutral')
         
         # More nuanced boredom calculation
-        boredom_level = self._calculate_boredom_level(emotional_state, recent_messages)
+        boredom_level = self._calculate_boredom_level(
+            avg_engagement, energy, primary_emotion, recent_messages
+        )
         
         # Topic persistence analysis
         topic_persistence = self.messages_on_topic
-        time_on_topic = (datetime.now() - self.topic_start_time).seconds / 60
+        time_on_topic = (now - self.topic_start_time).total_seconds() / 60
         
         # More nuanced initiative analysis
         initiative_analysis = self._analyze_initiative_needs(
-            boredom_level, avg_engagement, topic_persistence, emotional_state
+            boredom_level, avg_engagement, topic_persistence, primary_emotion
         )
         
-        return {
+        context = {
             'avg_engagement': avg_engagement,
             'boredom_level': boredom_level,
             'topic_persistence': topic_persistence,
@@ -63,58 +216,102 @@ class BehavioralEngine:
             'initiative_recommended': initiative_analysis['needed'],
             'initiative_type': initiative_analysis['type'],
             'initiative_intensity': initiative_analysis['intensity'],
-            'conversation_energy': emotional_state.get('energy_level', 0.5),
+            'conversation_energy': energy,
             'pattern_break_needed': self._detect_repetitive_pattern(recent_messages),
-            'behavioral_mode': self._determine_behavioral_mode(emotional_state)
+            'behavioral_mode': self._determine_behavioral_mode(primary_emotion, energy, avg_engagement)
         }
+        return context, initiative_analysis['triggers']
+    
+    def batch_analyze(self, states):
+        """Analyze several conversation turns in one call
+        
+        Args:
+            states: list of (recent_messages, emotional_state) tuples, in turn order
+        
+        Returns:
+            list of behavior contexts, one per turn (same shape as analyze_conversation_state)
+        """
+        return [self.analyze_conversation_state(recent_messages, emotional_state)
+                for recent_messages, emotional_state in states]
     
-    def _calculate_boredom_level(self, emotional_state, recent_messages):
+    def _calculate_boredom_level(self, engagement, energy, primary_emotion, recent_messages):
         """More balanced boredom detection"""
         boredom_score = 0.0
         
         # Emotional state boredom (less sensitive)
-        engagement = emotional_state.get('engagement_level', 0.5)
         if engagement < 0.4:
             boredom_score += 0.3  # Reduced from 0.4
         elif engagement < 0.6:
             boredom_score += 0.1
         
         # Energy level boredom
-        energy = emotional_state.get('energy_level', 0.5)
         if energy < 0.3:
             boredom_score += 0.2
         
         # Message analysis (more balanced)
         if recent_messages:
-            recent_lengths = []
+            # Single pass: running total instead of a list of lengths
+            total_words = 0
+            counted = 0
             for msg in recent_messages[-3:]:
                 content = msg.get('content', '')
                 if content:
-                    recent_lengths.append(len(content.split()))
+                    total_words += len(content.split())
+                    counted += 1
             
-            if recent_lengths:
-                avg_length = sum(recent_lengths) / len(recent_lengths)
+            if counted:
+                avg_length = total_words / counted
                 if avg_length < 4:
                     boredom_score += 0.2
                 elif avg_length < 6:
                     boredom_score += 0.1
         
         # Topic persistence (more gradual)
-        if self.messages_on_topic > self.behavioral_params['topic_change_frequency']:
-            excess = self.messages_on_topic - self.behavioral_params['topic_change_frequency']
+        tcf = self._tcf
+        messages = self.messages_on_topic
+        if messages > tcf:
+            excess = messages - tcf
             boredom_score += min(0.3, excess * 0.1)  # More gradual escalation
         
         # Emotional stagnation
-        if emotional_state.get('primary_emotion') in ['bored', 'tired']:
+        if primary_emotion in _BORED_TIRED:
             boredom_score += 0.2
         
         return min(1.0, boredom_score)
     
-    def _analyze_initiative_needs(self, boredom_level, engagement, topic_persistence, emotional_state):
+    @staticmethod
+    def encode_emotions(emotions):
+        """Encode emotion names as an int8 array for score_grid_boredom"""
+        return np.array([EMOTION_CODES.get(e, 0) for e in emotions], dtype=np.int8)
+    
+    def score_grid_boredom(self, engagement, energy, msgs_on_topic, primary_emotion_codes):
+        """Vectorized boredom score over many candidate states (e.g. tuning sweeps)
+        
+        Same thresholds as _calculate_boredom_level, without the recent message
+        length term (there are no messages for a hypothetical state).
+        All inputs are equal-length NumPy arrays; emotions come from encode_emotions().
+        """
+        if not HAS_NUMPY:
+            raise ImportError("numpy is required for score_grid_boredom")
+        
+        engagement = np.asarray(engagement, dtype=np.float32)
+        energy = np.asarray(energy, dtype=np.float32)
+        msgs_on_topic = np.asarray(msgs_on_topic, dtype=np.float32)
+        codes = np.asarray(primary_emotion_codes)
+        
+        scores = np.where(engagement < 0.4, 0.3, np.where(engagement < 0.6, 0.1, 0.0))
+        scores += np.where(energy < 0.3, 0.2, 0.0)
+        excess = np.maximum(0, msgs_on_topic - self._tcf)
+        scores += np.minimum(0.3, excess * 0.1)
+        scores += np.where((codes == EMOTION_CODES['bored']) | (codes == EMOTION_CODES['tired']), 0.2, 0.0)
+        return np.minimum(1.0, scores)
+    
+    def _analyze_initiative_needs(self, boredom_level, engagement, topic_persistence, primary_emotion):
         """More nuanced initiative analysis"""
         
         initiative_score = 0.0
         triggers = []
+        params = self.behavioral_params
         
         # Boredom trigger (more balanced)
         if boredom_level > 0.5:
@@ -125,32 +322,34 @@ class BehavioralEngine:
             triggers.append('MILD_BOREDOM')
         
         # Engagement trigger (more conservative)
-        if engagement < self.behavioral_params['initiative_threshold']:
+        if engagement < params['initiative_threshold']:
             initiative_score += 0.25
             triggers.append('LOW_ENGAGEMENT')
         
         # Topic persistence (less aggressive)
-        if topic_persistence > self.behavioral_params['topic_change_frequency'] * 1.5:
+        if topic_persistence > self._tcf_x15:
             initiative_score += 0.25
             triggers.append('TOPIC_FATIGUE')
-        elif topic_persistence > self.behavioral_params['topic_change_frequency']:
+        elif topic_persistence > self._tcf:
             initiative_score += 0.1
             triggers.append('TOPIC_AGING')
         
         # Emotional state triggers (more nuanced)
-        primary_emotion = emotional_state.get('primary_emotion', 'neutral')
-        if primary_emotion in ['bored', 'tired']:
+        if primary_emotion in _BORED_TIRED:
             initiative_score += 0.3
             triggers.append('NEGATIVE_EMOTION')
-        elif primary_emotion in ['contemplative', 'reflective']:
+        elif primary_emotion in _CONTEMPLATIVE:
             initiative_score += 0.1  # Gentle nudge for thoughtful states
             triggers.append('THOUGHTFUL_MOMENT')
         elif primary_emotion == 'neutral' and engagement < 0.5:
             initiative_score += 0.15
             triggers.append('EMOTIONAL_FLATNESS')
         
-        # Curiosity-driven actions (more moderate)
-        if random.random() < (self.behavioral_params['curiosity_drive'] * 0.1):
+        # Curiosity-driven actions (more moderate) - fires about once per
+        # 1/(curiosity_drive*0.1) messages, without touching the global RNG
+        self._curiosity_counter += 1
+        if self._curiosity_counter >= self._curiosity_period:
+            self._curiosity_counter = 0
             initiative_score += 0.15
             triggers.append('SPONTANEOUS_CURIOSITY')
         
@@ -182,68 +381,52 @@ class BehavioralEngine:
             return False
         
         # Simple pattern detection - similar message lengths or content
-        ai_messages = [msg for msg in recent_messages if msg.get('role') == 'assistant']
-        if len(ai_messages) >= 3:
-            lengths = [len(msg.get('content', '').split()) for msg in ai_messages[-3:]]
-            # If all messages are very similar length, might be pattern
-            if max(lengths) - min(lengths) < 5:  # More tolerance
-                return True
-        
-        return False
+        # Walk backwards and stop at the last 3 assistant messages
+        lengths = []
+        for msg in reversed(recent_messages):
+            if msg.get('role') == 'assistant':
+                lengths.append(len(msg.get('content', '').split()))
+                if len(lengths) == 3:
+                    break
+        
+        if len(lengths) < 3:
+            return False
+        
+        # If all messages are very similar length, might be pattern
+        return max(lengths) - min(lengths) < 5  # More tolerance
     
-    def _determine_behavioral_mode(self, emotional_state):
+    def _determine_behavioral_mode(self, emotion, energy, engagement):
         """Determine behavioral mode based on emotional state"""
-        emotion = emotional_state.get('primary_emotion', 'neutral')
-        energy = emotional_state.get('energy_level', 0.5)
-        engagement = emotional_state.get('engagement_level', 0.5)
-        
-        if emotion in ['contemplative', 'reflective', 'thoughtful']:
-            return 'contemplative'
-        elif emotion in ['tired'] or energy < 0.3:
-            return 'low_energy'
-        elif emotion in ['excited'] and energy > 0.7:
-            return 'energetic'
-        elif engagement > 0.7:
-            return 'engaged'
-        elif engagement < 0.3:
-            return 'disengaged'
-        else:
-            return 'balanced'
+        return _mode(emotion, _threshold_bin(energy), _threshold_bin(engagement))
     
     def get_initiative_guidance(self, context):
         """Generate GUIDANCE instead of commands - less prescriptive"""
-        
-        initiative_type = context.get('initiative_type', 'none')
-        behavioral_mode = context.get('behavioral_mode', 'balanced')
-        triggers = context.get('initiative_triggers', [])
-        
+        return self._build_guidance(
+            context.get('initiative_type', 'none'),
+            _as_mode(context.get('behavioral_mode', Mode.BALANCED)),
+            context.get('initiative_triggers', []),
+            context.get('pattern_break_needed', False)
+        )
+    
+    def _build_guidance(self, initiative_type, behavioral_mode, triggers, pattern_break_needed):
+        """Guidance list from already-extracted analysis values"""
         guidance = []
         
         # Mode-based guidance (inspirational, not commanding)
-        if behavioral_mode == 'contemplative':
-            guidance.append("MOOD_CONTEMPLATIVE")  # Let Claude interpret this
-        elif behavioral_mode == 'low_energy':
-            guidance.append("MOOD_LOW_ENERGY")
-        elif behavioral_mode == 'energetic':
-            guidance.append("MOOD_ENERGETIC")
-        elif behavioral_mode == 'disengaged':
-            guidance.append("ENGAGEMENT_LOW")
+        guidance.extend(_MODE_GUIDANCE[behavioral_mode])
         
         # Initiative-level guidance (suggestive, not commanding)
-        if initiative_type == 'strong':
-            guidance.append("TAKE_INITIATIVE")  # Generic, let Claude decide how
-        elif initiative_type == 'moderate':
-            guidance.append("SHOW_INTEREST")
-        elif initiative_type == 'gentle':
-            guidance.append("BE_CURIOUS")
+        initiative_guidance = _INITIATIVE_GUIDANCE.get(initiative_type)
+        if initiative_guidance:
+            guidance.append(initiative_guidance)
         
         # Specific situation guidance (still generic)
         if 'TOPIC_FATIGUE' in triggers:
-            guidance.append("TOPIC_STALE")
+            guidance.append(_G_TOPIC_STALE)
         if 'MODERATE_BOREDOM' in triggers:
-            guidance.append("CONVERSATION_STAGNANT")
-        if context.get('pattern_break_needed', False):
-            guidance.append("BREAK_PATTERN")
+            guidance.append(_G_CONVERSATION_STAGNANT)
+        if pattern_break_needed:
+            guidance.append(_G_BREAK_PATTERN)
         
         return guidance
     
@@ -258,17 +441,12 @@ class BehavioralEngine:
             'success': engagement_result > 0.6,
             'strong_success': engagement_result > 0.8
         })
-        
-        # Keep history manageable
-        if len(self.initiative_history) > 20:
-            self.initiative_history = self.initiative_history[-10:]
+        self._push_recent_outcome(bool(initiative_taken), engagement_result > 0.6)
         
         # More gradual parameter adaptation
         if len(self.initiative_history) >= 4:
-            recent_initiatives = [h for h in self.initiative_history[-5:] if h['initiative_taken']]
-            
-            if recent_initiatives:
-                success_rate = sum(1 for h in recent_initiatives if h['success']) / len(recent_initiatives)
+            if self._recent_taken:
+                success_rate = self._recent_success / self._recent_taken
                 
                 # More conservative adjustments
                 if success_rate > 0.8:
@@ -279,63 +457,81 @@ class BehavioralEngine:
                     # Initiative not working, be more conservative
                     self.behavioral_params['initiative_threshold'] = max(0.2,
                         self.behavioral_params['initiative_threshold'] - 0.05)
+        
+        self._refresh_derived()
+    
+    def _refresh_derived(self):
+        """Recompute values derived from behavioral_params (call after changing them)"""
+        self._tcf = self.behavioral_params['topic_change_frequency']
+        self._tcf_x15 = self._tcf * 1.5
+        curiosity_rate = self.behavioral_params['curiosity_drive'] * 0.1
+        self._curiosity_period = int(round(1.0 / curiosity_rate)) if curiosity_rate > 0 else float('inf')
     
     def suggest_conversation_actions(self, context):
         """Less prescriptive action suggestions"""
+        return self._build_actions(
+            _as_mode(context.get('behavioral_mode', Mode.BALANCED)),
+            context.get('boredom_level', 0),
+            context.get('avg_engagement', 0.5)
+        )
+    
+    def _build_actions(self, behavioral_mode, boredom_level, engagement):
+        """Action suggestions from already-extracted analysis values"""
         actions = []
         
-        boredom_level = context.get('boredom_level', 0)
-        engagement = context.get('avg_engagement', 0.5)
-        behavioral_mode = context.get('behavioral_mode', 'balanced')
-        
         # Mode-based suggestions (let Claude interpret)
-        if behavioral_mode == 'contemplative':
-            actions.extend(["thoughtful_question", "deeper_exploration"])
-        elif behavioral_mode == 'low_energy':
-            actions.extend(["gentle_nudge", "quiet_interest"])
-        elif behavioral_mode == 'energetic':
-            actions.extend(["enthusiastic_response", "dynamic_question"])
+        actions.extend(_MODE_ACTIONS[behavioral_mode])
         
         # Situation-based suggestions
         if boredom_level > 0.5:
-            actions.extend(["refresh_conversation", "new_perspective"])
+            actions.extend(_REFRESH_ACTIONS)
         elif engagement < 0.3:
-            actions.extend(["spark_interest", "find_connection"])
+            actions.extend(_SPARK_ACTIONS)
         
         return actions
     
-    def update_topic_tracking(self, new_topic_detected=False, topic_name=None):
+    def update_topic_tracking(self, new_topic_detected=False, topic_name=None, now=None):
         """Enhanced topic tracking with performance metrics"""
         if new_topic_detected:
+            if now is None:
+                now = datetime.now()
+            
             # Record performance of previous topic
             if self.current_topic:
-                duration = (datetime.now() - self.topic_start_time).seconds / 60
+                duration = (now - self.topic_start_time).total_seconds() / 60
+                msgs = self.messages_on_topic
                 self.topic_performance[self.current_topic] = {
-                    'messages': self.messages_on_topic,
+                    'messages': msgs,
                     'duration_minutes': duration,
-                    'last_used': datetime.now(),
-                    'engagement_per_message': self.messages_on_topic / max(1, duration),
-                    'success_score': max(0, min(1, (self.messages_on_topic - 2) / 5))
+                    'last_used': now,
+                    # Durations under a minute count as one minute
+                    'engagement_per_message': msgs / duration if duration > 1 else float(msgs),
+                    'success_score': 0.0 if msgs <= 2 else min(1.0, (msgs - 2) / 5)
                 }
+                self.topic_performance.move_to_end(self.current_topic)
+                while len(self.topic_performance) > self._topic_perf_cap:
+                    self.topic_performance.popitem(last=False)
             
             # Start tracking new topic
-            self.current_topic = topic_name or f"topic_{datetime.now().strftime('%H%M%S')}"
-            self.topic_start_time = datetime.now()
+            self.current_topic = topic_name or now.strftime('topic_%H%M%S')
+            self.topic_start_time = now
             self.messages_on_topic = 0
     
-    def get_behavioral_context(self):
+    def get_behavioral_context(self, now=None):
         """Enhanced behavioral state for LLM context"""
+        if now is None:
+            now = datetime.now()
         recent_success_rate = self._get_recent_success_rate()
         
         return {
             'current_topic': self.current_topic,
             'messages_on_topic': self.messages_on_topic,
-            'time_on_topic_minutes': (datetime.now() - self.topic_start_time).seconds / 60,
+            'time_on_topic_minutes': (now - self.topic_start_time).total_seconds() / 60,
             'initiative_threshold': self.behavioral_params['initiative_threshold'],
             'recent_initiative_success': recent_success_rate,
             'curiosity_drive': self.behavioral_params['curiosity_drive'],
             'boredom_tolerance': self.behavioral_params['boredom_tolerance'],
-            'topic_change_readiness': min(1.0, self.messages_on_topic / self.behavioral_params['topic_change_frequency'])
+            'topic_change_readiness': min(1.0, self.messages_on_topic / self._tcf)
         }
     
     def _get_recent_success_rate(self):
@@ -343,8 +539,18 @@ class BehavioralEngine:
         if len(self.initiative_history) < 2:
             return 0.5  # Default
         
-        recent = [h for h in self.initiative_history[-5:] if h['initiative_taken']]
-        if not recent:
+        if not self._recent_taken:
             return 0.5
         
-        return sum(1 for h in recent if h['success']) / len(recent)
\ No newline at end of file
+        return self._recent_success / self._recent_taken
+    
+    def _push_recent_outcome(self, taken, success):
+        """Add an outcome to the last-5 window, updating the running counts in O(1)"""
+        window = self._recent_window
+        if len(window) == window.maxlen:
+            old_taken, old_success = window[0]
+            self._recent_taken -= old_taken
+            self._recent_success -= old_taken and old_success
+        window.append((taken, success))
+        self._recent_taken += taken
+        self._recent_success += taken and success
\ No newline at end of file
@@ -1,260 +1,346 @@
 # engines/emotional.py - V3 with more tranquil/diverse emotional states
 from datetime import datetime, timedelta
+from enum import IntEnum
 import math
+import re
+import time
+import numpy as np
+from ._kernels import HAS_NUMBA, update_mood_kernel
+
+# Integer codes for the mood history ring buffer
+ID_TO_EMOTION = ('neutral', 'excited', 'engaged', 'contemplative', 'reflective', 'interested',
+                 'thoughtful', 'tired', 'bored', 'concerned', 'empathetic', 'helpful')
+EMOTION_IDS = {name: i for i, name in enumerate(ID_TO_EMOTION)}
+
+class Trigger(IntEnum):
+    """Emotional trigger buckets - use _TRIGGER_NAMES for the legacy string form"""
+    UPSET = 0
+    SAD = 1
+    EXCITED = 2
+    BORED = 3
+    CONFUSED = 4
+    THOUGHTFUL = 5
+    CALM = 6
+    NONE = 7
+
+_TRIGGER_NAMES = ('upset_keywords', 'sad_keywords', 'excited_keywords', 'bored_keywords',
+                  'confused_keywords', 'thoughtful_keywords', 'calm_keywords', 'normal_input')
+
+_HIST_CAP = 64  # Mood history entries kept (oldest are overwritten)
+_TREND_CAP = 16  # Engagement/feedback trend entries kept
+
+def _mono_to_datetime(mono_ns):
+    """Wall-clock datetime for a time.monotonic_ns() stamp (only built when someone reads it)"""
+    return datetime.now() - timedelta(microseconds=(time.monotonic_ns() - mono_ns) / 1000)
+
+def _ladder_emotion(engagement, energy):
+    """Reference (engagement, energy) -> emotion mapping, used to build EMOTION_LUT"""
+    if engagement > 0.8 and energy > 0.7:
+        return 'excited'
+    elif engagement > 0.7 and energy > 0.5:
+        return 'engaged'
+    elif engagement > 0.6 and energy < 0.4:
+        return 'contemplative'  # New tranquil state
+    elif engagement > 0.5 and energy < 0.3:
+        return 'reflective'     # New tranquil state
+    elif engagement > 0.4:
+        return 'interested'
+    elif engagement > 0.3 and energy < 0.4:
+        return 'thoughtful'     # New tranquil state
+    elif engagement > 0.2:
+        return 'neutral'
+    elif energy < 0.3:
+        return 'tired'          # New low-energy state
+    else:
+        return 'bored'
+
+# Bins follow the ladder's own thresholds (see _kernels._engagement_bin/_energy_bin),
+# so the table lookup is exact
+_ENGAGEMENT_REPS = (0.2, 0.25, 0.35, 0.45, 0.55, 0.65, 0.75, 0.85)  # cuts 0.2 ... 0.8
+_ENERGY_REPS = (0.25, 0.35, 0.45, 0.6, 0.8)  # <0.3, <0.4, <=0.5, <=0.7, >0.7
+
+# EMOTION_LUT[engagement_bin][energy_bin] -> emotion name
+EMOTION_LUT = tuple(
+    tuple(_ladder_emotion(eng, en) for en in _ENERGY_REPS)
+    for eng in _ENGAGEMENT_REPS
+)
+
+# Indexed by Trigger -> (engagement, energy, curiosity); each field is (base, intensity_coef, floor, cap)
+# applied as clamp(base + coef * intensity), or None to leave as is. The shifted emotion itself is
+# always re-derived from EMOTION_LUT afterwards, so it is not stored here.
+_TRIGGER_ACTIONS = (
+    ((0.8, 0.1, 0.0, 0.9), (0.7, 0.2, 0.0, 0.9), (0.8, 0.1, 0.0, 0.9)),  # UPSET
+    ((0.7, -0.1, 0.5, 1.0), (0.4, -0.1, 0.2, 1.0), None),              # SAD - more moderate
+    ((0.8, 0.1, 0.0, 0.9), (0.8, 0.1, 0.0, 0.9), None),                # EXCITED
+    ((0.2, 0.0, 0.1, 1.0), (0.3, 0.0, 0.1, 1.0), None),                # BORED
+    ((0.7, 0.1, 0.0, 0.8), None, (0.8, 0.1, 0.0, 0.9)),                # CONFUSED
+    # THOUGHTFUL - NEW: leads to contemplative state (lower energy)
+    ((0.6, 0.1, 0.0, 0.7), (0.4, -0.1, 0.2, 1.0), (0.7, 0.1, 0.0, 0.8)),
+    # CALM - NEW: leads to peaceful state (low energy)
+    ((0.5, 0.1, 0.0, 0.6), (0.3, 0.0, 0.2, 1.0), (0.5, 0.1, 0.0, 0.6)),
+    (None, None, None)                                                  # NONE
+)
+
+# Kernel inputs: None specs become a NaN base, emotion names become ids.
+# Numba wants homogeneous arrays; plain Python is faster on tuples of floats.
+_NO_SHIFT = (math.nan, 0.0, 0.0, 0.0)
+_SHIFT_TABLE = tuple(tuple(spec or _NO_SHIFT for spec in row) for row in _TRIGGER_ACTIONS)
+_EMOTION_ID_LUT = tuple(tuple(EMOTION_IDS[name] for name in row) for row in EMOTION_LUT)
+if HAS_NUMBA:
+    _SHIFT_TABLE = np.array(_SHIFT_TABLE, np.float64)
+    _EMOTION_ID_LUT = np.array(_EMOTION_ID_LUT, np.int64)
+    # Compile once at import instead of on the first message
+    update_mood_kernel(0.5, 0.5, 0.7, 0.5, False, int(Trigger.UPSET), 0.7,
+                       _SHIFT_TABLE, _EMOTION_ID_LUT, int(Trigger.NONE))
+
+_HIGH_INTENSITY_KEYWORDS = frozenset(('furious', 'devastated', 'incredible', 'amazing'))
+_LOW_INTENSITY_KEYWORDS = frozenset(('think', 'consider', 'calm', 'peaceful'))
+
+_WORD_RE = re.compile(r'\w+')
+
+def _keyword_intensity(keyword):
+    """Intensity based on keyword strength and context"""
+    if keyword in _HIGH_INTENSITY_KEYWORDS:
+        return 0.9
+    elif keyword in _LOW_INTENSITY_KEYWORDS:
+        return 0.4  # Gentler intensity for calm words
+    return 0.7
+
+class MoodState:
+    """Current mood - get_current_mood() returns it as the usual dict"""
+    __slots__ = ('primary_emotion', 'energy_level', 'engagement_level', 'curiosity_level')
+    
+    def __init__(self, primary_emotion='neutral', energy_level=0.5,
+                 engagement_level=0.5, curiosity_level=0.7):
+        self.primary_emotion = primary_emotion
+        self.energy_level = energy_level
+        self.engagement_level = engagement_level
+        self.curiosity_level = curiosity_level
 
 class EmotionalEngine:
+    __slots__ = ('current_mood', '_last_ns',
+                 '_hist_idx', '_hist_len', '_hist_ts', '_hist_eng', '_hist_energy',
+                 '_hist_curiosity', '_hist_msg_eng', '_hist_emotion_id', '_hist_trigger_id',
+                 '_hist_amplified',
+                 '_trend_idx', '_trend_len', '_trend_ts', '_trend_eng', '_trend_fb',
+                 '_trend_version', '_cached_stag', '_cached_action',
+                 'emotion_triggers', '_trigger_sets')
+    
     def __init__(self):
-        self.current_mood = {
-            'primary_emotion': 'neutral',
-            'energy_level': 0.5,
-            'engagement_level': 0.5,
-            'curiosity_level': 0.7,
-            'last_updated': datetime.now()
-        }
-        
-        self.mood_history = []
-        self.engagement_trend = []
+        self.current_mood = MoodState()
+        self._last_ns = time.monotonic_ns()  # see last_updated
+        
+        # Mood history as preallocated column arrays + write cursor (no per-turn dicts)
+        self._hist_idx = 0
+        self._hist_len = 0
+        self._hist_ts = np.zeros(_HIST_CAP, np.int64)  # time.monotonic_ns()
+        self._hist_eng = np.zeros(_HIST_CAP, np.float64)
+        self._hist_energy = np.zeros(_HIST_CAP, np.float64)
+        self._hist_curiosity = np.zeros(_HIST_CAP, np.float64)
+        self._hist_msg_eng = np.zeros(_HIST_CAP, np.float64)
+        self._hist_emotion_id = np.zeros(_HIST_CAP, np.int8)
+        self._hist_trigger_id = np.full(_HIST_CAP, Trigger.NONE, np.int8)
+        self._hist_amplified = np.zeros(_HIST_CAP, np.bool_)
+        
+        # Engagement/feedback trend, same ring buffer layout
+        self._trend_idx = 0
+        self._trend_len = 0
+        self._trend_ts = np.zeros(_TREND_CAP, np.int64)  # time.monotonic_ns()
+        self._trend_eng = np.zeros(_TREND_CAP, np.float64)
+        self._trend_fb = np.zeros(_TREND_CAP, np.float64)
+        
+        # Bumped whenever mood or trend changes; keys the stagnation/action memos
+        self._trend_version = 0
+        self._cached_stag = (None, -1)
+        self._cached_action = (None, -1)
         
         # Enhanced emotional keywords for dramatic reactions
         self.emotion_triggers = {
-            'upset_keywords': ['upset', 'angry', 'frustrated', 'mad', 'annoyed', 'furious', 'pissed'],
-            'sad_keywords': ['sad', 'depressed', 'down', 'crying', 'heartbroken', 'devastated'],
-            'excited_keywords': ['excited', 'thrilled', 'amazing', 'awesome', 'fantastic', 'incredible'],
-            'bored_keywords': ['boring', 'bored', 'tired', 'whatever', 'meh', 'uninteresting'],
-            'confused_keywords': ['confused', 'lost', 'unclear', 'what', 'huh', 'understand'],
-            'thoughtful_keywords': ['think', 'consider', 'reflect', 'ponder', 'contemplate', 'wonder'],
-            'calm_keywords': ['peaceful', 'calm', 'relaxed', 'serene', 'quiet', 'still']
+            Trigger.UPSET: ('upset', 'angry', 'frustrated', 'mad', 'annoyed', 'furious', 'pissed'),
+            Trigger.SAD: ('sad', 'depressed', 'down', 'crying', 'heartbroken', 'devastated'),
+            Trigger.EXCITED: ('excited', 'thrilled', 'amazing', 'awesome', 'fantastic', 'incredible'),
+            Trigger.BORED: ('boring', 'bored', 'tired', 'whatever', 'meh', 'uninteresting'),
+            Trigger.CONFUSED: ('confused', 'lost', 'unclear', 'what', 'huh', 'understand'),
+            Trigger.THOUGHTFUL: ('think', 'consider', 'reflect', 'ponder', 'contemplate', 'wonder'),
+            Trigger.CALM: ('peaceful', 'calm', 'relaxed', 'serene', 'quiet', 'still')
         }
+        
+        # Frozensets for O(1) whole-word lookups, checked in bucket order
+        self._trigger_sets = [
+            (emotion_type, frozenset(keywords))
+            for emotion_type, keywords in self.emotion_triggers.items()
+        ]
     
     def update_mood_from_input(self, parsed_message):
         """Enhanced emotional reactions with more diverse states"""
         
-        message_text = parsed_message.get('raw_message', '').lower()
+        message_text = parsed_message.get('lower_message') or parsed_message.get('raw_message', '').lower()
         message_engagement = parsed_message.get('estimated_engagement', 0.5)
         
         # EMOTIONAL EARTHQUAKE DETECTION
         emotional_impact = self._detect_emotional_triggers(message_text)
         
-        # AMPLIFIED REACTIONS but with more variety
-        if emotional_impact['trigger_detected']:
-            self._apply_emotional_shift(emotional_impact)
-        else:
-            # Normal processing with amplification but more nuanced
-            current_engagement = self.current_mood['engagement_level']
-            new_engagement = 0.5 * current_engagement + 0.5 * message_engagement
-            
-            # AMPLIFY the change but allow for downward movement
-            change = new_engagement - current_engagement
-            amplified_change = change * 2.0  # Reduced from 2.5 for more stability
-            final_engagement = max(0.1, min(0.9, current_engagement + amplified_change))
-            
-            self.current_mood['engagement_level'] = final_engagement
-        
-        # Update energy with more variety (can go down too)
-        if message_engagement > 0.7:
-            self.current_mood['energy_level'] = min(0.9, self.current_mood['energy_level'] + 0.15)
-        elif message_engagement < 0.3:
-            self.current_mood['energy_level'] = max(0.1, self.current_mood['energy_level'] - 0.15)
-        elif message_engagement < 0.4:
-            # Slight energy decrease for mild disengagement
-            self.current_mood['energy_level'] = max(0.2, self.current_mood['energy_level'] - 0.05)
-        
-        # More diverse emotion mapping with tranquil states
-        engagement = self.current_mood['engagement_level']
-        energy = self.current_mood['energy_level']
-        
-        # Map emotions based on both engagement AND energy
-        if engagement > 0.8 and energy > 0.7:
-            self.current_mood['primary_emotion'] = 'excited'
-        elif engagement > 0.7 and energy > 0.5:
-            self.current_mood['primary_emotion'] = 'engaged'
-        elif engagement > 0.6 and energy < 0.4:
-            self.current_mood['primary_emotion'] = 'contemplative'  # New tranquil state
-        elif engagement > 0.5 and energy < 0.3:
-            self.current_mood['primary_emotion'] = 'reflective'    # New tranquil state
-        elif engagement > 0.4:
-            self.current_mood['primary_emotion'] = 'interested'
-        elif engagement > 0.3 and energy < 0.4:
-            self.current_mood['primary_emotion'] = 'thoughtful'    # New tranquil state
-        elif engagement > 0.2:
-            self.current_mood['primary_emotion'] = 'neutral'
-        elif energy < 0.3:
-            self.current_mood['primary_emotion'] = 'tired'         # New low-energy state
-        else:
-            self.current_mood['primary_emotion'] = 'bored'
-        
-        # Update curiosity more gradually
-        if parsed_message.get('has_question', False):
-            self.current_mood['curiosity_level'] = min(0.9, self.current_mood['curiosity_level'] + 0.1)
-        else:
-            # Slight curiosity decay over time
-            self.current_mood['curiosity_level'] = max(0.3, self.current_mood['curiosity_level'] - 0.02)
-        
-        # Record in history
-        self.mood_history.append({
-            'timestamp': datetime.now(),
-            'mood_state': self.current_mood.copy(),
-            'trigger': emotional_impact.get('primary_trigger', 'normal_input'),
-            'engagement_score': message_engagement,
-            'amplification_applied': emotional_impact['trigger_detected']
-        })
-        
-        # Keep history manageable
-        if len(self.mood_history) > 50:
-            self.mood_history = self.mood_history[-25:]
-        
-        self.current_mood['last_updated'] = datetime.now()
+        # Shift/amplify, energy, emotion mapping and curiosity in one numeric kernel
+        mood = self.current_mood
+        engagement, energy, curiosity, emotion_id = update_mood_kernel(
+            mood.engagement_level, mood.energy_level, mood.curiosity_level,
+            float(message_engagement), bool(parsed_message.get('has_question', False)),
+            int(emotional_impact['primary_trigger']), emotional_impact['intensity'],
+            _SHIFT_TABLE, _EMOTION_ID_LUT, int(Trigger.NONE)
+        )
+        mood.engagement_level = engagement
+        mood.energy_level = energy
+        mood.curiosity_level = curiosity
+        mood.primary_emotion = ID_TO_EMOTION[emotion_id]
+        
+        # Record in history (ring buffer write, oldest entry is overwritten)
+        i = self._hist_idx
+        self._hist_ts[i] = time.monotonic_ns()
+        self._hist_eng[i] = engagement
+        self._hist_energy[i] = energy
+        self._hist_curiosity[i] = curiosity
+        self._hist_msg_eng[i] = message_engagement
+        self._hist_emotion_id[i] = emotion_id
+        self._hist_trigger_id[i] = emotional_impact['primary_trigger']
+        self._hist_amplified[i] = emotional_impact['trigger_detected']
+        self._hist_idx = (i + 1) % _HIST_CAP
+        self._hist_len = min(_HIST_CAP, self._hist_len + 1)
+        
+        self._last_ns = time.monotonic_ns()
+        self._trend_version += 1
     
     def _detect_emotional_triggers(self, message_text):
         """Detect emotional triggers for reactions (expanded)"""
         
         trigger_info = {
             'trigger_detected': False,
-            'primary_trigger': None,
+            'primary_trigger': Trigger.NONE,
             'intensity': 0.0
         }
         
-        for emotion_type, keywords in self.emotion_triggers.items():
-            for keyword in keywords:
-                if keyword in message_text:
-                    trigger_info['trigger_detected'] = True
-                    trigger_info['primary_trigger'] = emotion_type
-                    # Intensity based on keyword strength and context
-                    if keyword in ['furious', 'devastated', 'incredible', 'amazing']:
-                        trigger_info['intensity'] = 0.9
-                    elif keyword in ['think', 'consider', 'calm', 'peaceful']:
-                        trigger_info['intensity'] = 0.4  # Gentler intensity for calm words
-                    else:
-                        trigger_info['intensity'] = 0.7
-                    break
-            if trigger_info['trigger_detected']:
+        # Whole words only, so 'what' no longer fires on "somewhat" or 'mad' on "made"
+        tokens = set(_WORD_RE.findall(message_text))
+        if not tokens:
+            return trigger_info
+        
+        for emotion_type, keyword_set in self._trigger_sets:
+            hits = keyword_set & tokens
+            if hits:
+                # First keyword in list order decides intensity, as before
+                keyword = next(k for k in self.emotion_triggers[emotion_type] if k in hits)
+                trigger_info['trigger_detected'] = True
+                trigger_info['primary_trigger'] = emotion_type
+                trigger_info['intensity'] = _keyword_intensity(keyword)
                 break
         
         return trigger_info
     
-    def _apply_emotional_shift(self, emotional_impact):
-        """Apply emotional changes with more diverse outcomes"""
-        
-        trigger_type = emotional_impact['primary_trigger']
-        intensity = emotional_impact['intensity']
-        
-        if 'upset' in trigger_type:
-            # EMOTIONAL RESPONSE for upset
-            self.current_mood['primary_emotion'] = 'concerned'
-            self.current_mood['engagement_level'] = min(0.9, 0.8 + intensity * 0.1)
-            self.current_mood['energy_level'] = min(0.9, 0.7 + intensity * 0.2)
-            self.current_mood['curiosity_level'] = min(0.9, 0.8 + intensity * 0.1)
-            
-        elif 'sad' in trigger_type:
-            self.current_mood['primary_emotion'] = 'empathetic'
-            self.current_mood['engagement_level'] = max(0.5, 0.7 - intensity * 0.1)  # More moderate
-            self.current_mood['energy_level'] = max(0.2, 0.4 - intensity * 0.1)
-            
-        elif 'excited' in trigger_type:
-            self.current_mood['primary_emotion'] = 'excited'
-            self.current_mood['engagement_level'] = min(0.9, 0.8 + intensity * 0.1)
-            self.current_mood['energy_level'] = min(0.9, 0.8 + intensity * 0.1)
-            
-        elif 'bored' in trigger_type:
-            self.current_mood['primary_emotion'] = 'bored'
-            self.current_mood['engagement_level'] = max(0.1, 0.2)
-            self.current_mood['energy_level'] = max(0.1, 0.3)
-            
-        elif 'confused' in trigger_type:
-            self.current_mood['primary_emotion'] = 'helpful'
-            self.current_mood['engagement_level'] = min(0.8, 0.7 + intensity * 0.1)
-            self.current_mood['curiosity_level'] = min(0.9, 0.8 + intensity * 0.1)
-            
-        elif 'thoughtful' in trigger_type:
-            # NEW: Thoughtful trigger leads to contemplative state
-            self.current_mood['primary_emotion'] = 'contemplative'
-            self.current_mood['engagement_level'] = min(0.7, 0.6 + intensity * 0.1)
-            self.current_mood['energy_level'] = max(0.2, 0.4 - intensity * 0.1)  # Lower energy
-            self.current_mood['curiosity_level'] = min(0.8, 0.7 + intensity * 0.1)
-            
-        elif 'calm' in trigger_type:
-            # NEW: Calm trigger leads to peaceful state
-            self.current_mood['primary_emotion'] = 'reflective'
-            self.current_mood['engagement_level'] = min(0.6, 0.5 + intensity * 0.1)
-            self.current_mood['energy_level'] = max(0.2, 0.3)  # Low energy
-            self.current_mood['curiosity_level'] = min(0.6, 0.5 + intensity * 0.1)
+    @property
+    def last_updated(self):
+        """datetime of the last mood update"""
+        return _mono_to_datetime(self._last_ns)
     
     def get_current_mood(self):
         """Return current emotional state"""
-        return self.current_mood.copy()
+        mood = self.current_mood
+        return {
+            'primary_emotion': mood.primary_emotion,
+            'energy_level': mood.energy_level,
+            'engagement_level': mood.engagement_level,
+            'curiosity_level': mood.curiosity_level,
+            'last_updated': self.last_updated
+        }
     
     def learn_from_feedback(self, engagement_score, feedback_score):
         """Enhanced learning with more gradual adaptations"""
         
         # Track engagement trend with more weight to recent interactions
-        self.engagement_trend.append({
-            'timestamp': datetime.now(),
-            'engagement': engagement_score,
-            'feedback': feedback_score
-        })
-        
-        # Keep trend data manageable  
-        if len(self.engagement_trend) > 20:
-            self.engagement_trend = self.engagement_trend[-10:]
-        
-        # More gradual adjustments based on feedback
+        i = self._trend_idx
+        self._trend_ts[i] = time.monotonic_ns()
+        self._trend_eng[i] = engagement_score
+        self._trend_fb[i] = feedback_score
+        self._trend_idx = (i + 1) % _TREND_CAP
+        self._trend_len = min(_TREND_CAP, self._trend_len + 1)
+        
+        # More gradual adjustments based on feedback (one read, one write)
+        energy = self.current_mood.energy_level
         if feedback_score > 0.8:
             # Excellent interaction - small confidence boost
-            self.current_mood['energy_level'] = min(0.9, self.current_mood['energy_level'] + 0.05)
+            self.current_mood.energy_level = min(0.9, energy + 0.05)
         elif feedback_score < 0.3:
             # Poor interaction - moderate adjustment
-            if self.current_mood['energy_level'] > 0.7:
+            if energy > 0.7:
                 # Was too energetic - moderate reduction
-                self.current_mood['energy_level'] *= 0.8
-            elif self.current_mood['energy_level'] < 0.3:
+                self.current_mood.energy_level = energy * 0.8
+            elif energy < 0.3:
                 # Was too low energy - moderate boost
-                self.current_mood['energy_level'] = min(0.6, self.current_mood['energy_level'] * 1.2)
+                self.current_mood.energy_level = min(0.6, energy * 1.2)
+        
+        self._trend_version += 1
     
     def detect_conversation_stagnation(self):
-        """More nuanced stagnation detection"""
-        if len(self.engagement_trend) < 3:
+        """More nuanced stagnation detection (memoized until the next mood/trend update)"""
+        stagnation, version = self._cached_stag
+        if version != self._trend_version:
+            stagnation = self._detect_stagnation()
+            self._cached_stag = (stagnation, self._trend_version)
+        return stagnation
+    
+    def _detect_stagnation(self):
+        if self._trend_len < 3:
             return False
         
-        # Check recent trend
-        recent_scores = [item['engagement'] for item in self.engagement_trend[-3:]]
+        # Check recent trend (oldest first)
+        recent_scores = self._trend_eng[self._trend_recent(3)]
         
         # Stagnation if consistently low or declining
-        avg_recent = sum(recent_scores) / len(recent_scores)
-        if avg_recent < 0.4:
+        if recent_scores.mean() < 0.4:
             return True
         
         # Also check for declining trend
-        if len(recent_scores) >= 3:
-            if recent_scores[-1] < recent_scores[-2] < recent_scores[-3]:
-                return True
+        if recent_scores[2] < recent_scores[1] < recent_scores[0]:
+            return True
         
         # Current engagement very low
-        if self.current_mood['engagement_level'] < 0.3:
+        if self.current_mood.engagement_level < 0.3:
             return True
             
         return False
     
-    def should_take_dramatic_action(self):
-        """Determine if strong action is needed (more conservative)"""
-        
+    def should_take_dramatic_action(self, stagnation=None):
+        """Determine if strong action is needed (more conservative)
+        
+        `stagnation` can pass in an already computed detect_conversation_stagnation() result.
+        Without it the result is memoized until the next mood/trend update.
+        """
+        if stagnation is not None:
+            return self._dramatic_action(stagnation)
+        
+        action, version = self._cached_action
+        if version != self._trend_version:
+            action = self._dramatic_action(self.detect_conversation_stagnation())
+            self._cached_action = (action, self._trend_version)
+        # Callers get their own triggers list
+        return dict(action, triggers=list(action['triggers']))
+    
+    def _dramatic_action(self, stagnation):
         triggers = []
         
         # Stagnation trigger
-        if self.detect_conversation_stagnation():
+        if stagnation:
             triggers.append('STAGNATION_DETECTED')
         
         # Very low energy for extended period
-        if self.current_mood['energy_level'] < 0.2:
+        if self.current_mood.energy_level < 0.2:
             triggers.append('VERY_LOW_ENERGY')
         
         # Negative emotion
-        if self.current_mood['primary_emotion'] in ['bored', 'tired']:
+        if self.current_mood.primary_emotion in ['bored', 'tired']:
             triggers.append('NEGATIVE_EMOTION')
         
         # Recent poor feedback (more conservative threshold)
-        if len(self.engagement_trend) >= 3:
-            recent_feedback = [item['feedback'] for item in self.engagement_trend[-3:]]
-            if sum(recent_feedback) / len(recent_feedback) < 0.4:  # More conservative
+        if self._trend_len >= 3:
+            if self._trend_fb[self._trend_recent(3)].mean() < 0.4:  # More conservative
                 triggers.append('POOR_FEEDBACK')
         
         return {
@@ -267,25 +353,61 @@ class EmotionalEngine:
         """Enhanced emotional context with nuanced action triggers"""
         
         recent_mood_trend = []
-        if len(self.mood_history) >= 3:
-            for entry in self.mood_history[-3:]:
+        if self._hist_len >= 3:
+            for i in self._hist_recent(3):
                 recent_mood_trend.append({
-                    'emotion': entry['mood_state']['primary_emotion'],
-                    'engagement': entry['mood_state']['engagement_level'],
-                    'energy': entry['mood_state']['energy_level'],
-                    'trigger_applied': entry.get('amplification_applied', False)
+                    'emotion': ID_TO_EMOTION[self._hist_emotion_id[i]],
+                    'engagement': float(self._hist_eng[i]),
+                    'energy': float(self._hist_energy[i]),
+                    'trigger_applied': bool(self._hist_amplified[i])
                 })
         
         dramatic_action = self.should_take_dramatic_action()
+        stagnation = 'STAGNATION_DETECTED' in dramatic_action['triggers']
         
         return {
-            'current_emotion': self.current_mood['primary_emotion'],
-            'energy_level': self.current_mood['energy_level'],
-            'engagement_level': self.current_mood['engagement_level'],
-            'curiosity_level': self.current_mood['curiosity_level'],
+            'current_emotion': self.current_mood.primary_emotion,
+            'energy_level': self.current_mood.energy_level,
+            'engagement_level': self.current_mood.engagement_level,
+            'curiosity_level': self.current_mood.curiosity_level,
             'recent_trend': recent_mood_trend,
-            'stagnation_detected': self.detect_conversation_stagnation(),
+            'stagnation_detected': stagnation,
             'dramatic_action_needed': dramatic_action['take_action'],
             'action_triggers': dramatic_action['triggers'],
             'action_intensity': dramatic_action.get('action_intensity', 0)
-        }
\ No newline at end of file
+        }
+    
+    def _hist_recent(self, count):
+        """Ring buffer indices of the last `count` mood entries, oldest first"""
+        count = min(count, self._hist_len)
+        return (self._hist_idx - np.arange(count, 0, -1)) % _HIST_CAP
+    
+    def _trend_recent(self, count):
+        """Ring buffer indices of the last `count` trend entries, oldest first"""
+        count = min(count, self._trend_len)
+        return (self._trend_idx - np.arange(count, 0, -1)) % _TREND_CAP
+    
+    @property
+    def engagement_trend(self):
+        """Engagement/feedback trend materialized as a list of dicts, oldest first"""
+        return [{
+            'timestamp': _mono_to_datetime(int(self._trend_ts[i])),
+            'engagement': float(self._trend_eng[i]),
+            'feedback': float(self._trend_fb[i])
+        } for i in self._trend_recent(self._trend_len)]
+    
+    @property
+    def mood_history(self):
+        """Mood history materialized as a list of dicts, oldest first (debugging/inspection)"""
+        return [{
+            'timestamp': _mono_to_datetime(int(self._hist_ts[i])),
+            'mood_state': {
+                'primary_emotion': ID_TO_EMOTION[self._hist_emotion_id[i]],
+                'energy_level': float(self._hist_energy[i]),
+                'engagement_level': float(self._hist_eng[i]),
+                'curiosity_level': float(self._hist_curiosity[i])
+            },
+            'trigger': _TRIGGER_NAMES[self._hist_trigger_id[i]],
+            'engagement_score': float(self._hist_msg_eng[i]),
+            'amplification_applied': bool(self._hist_amplified[i])
+        } for i in self._hist_recent(self._hist_len)]
\ No newline at end of file
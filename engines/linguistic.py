@@ -1,77 +1,95 @@
 # engines/linguistic.py - V4 NUDE DATA ONLY - No guidance, no examples, pure freedom
+from functools import lru_cache
 import json
 import re
 
-class LinguisticEngine:
-    def __init__(self):
-        # NO conversation starters - let Claude be naturally creative
-        pass
-    
-    def parse_user_message(self, message):
-        """Enhanced parsing with emotional trigger detection (unchanged)"""
-        parsed = {
-            'raw_message': message,
-            'length': len(message),
-            'word_count': len(message.split()),
-            'has_question': '?' in message,
-            'exclamation_count': message.count('!'),
-            'uppercase_ratio': sum(1 for c in message if c.isupper()) / max(1, len(message))
-        }
-        
-        # Enhanced engagement estimation
-        engagement_score = 0.5  # baseline
-        
-        # Length-based engagement (more nuanced)
-        if parsed['word_count'] > 15:
-            engagement_score += 0.25
-        elif parsed['word_count'] > 8:
-            engagement_score += 0.15
-        elif parsed['word_count'] < 2:
-            engagement_score -= 0.4
-        elif parsed['word_count'] < 4:
-            engagement_score -= 0.2
-        
-        # Interaction signals
-        if parsed['has_question']:
-            engagement_score += 0.2
-        if parsed['exclamation_count'] > 0:
-            engagement_score += 0.15
-        if parsed['exclamation_count'] > 2:
-            engagement_score += 0.1  # Bonus for high excitement
-        if parsed['uppercase_ratio'] > 0.3:  # Shouting or emphasis
-            engagement_score += 0.15
-        
-        # Emotional content detection (basic)
-        message_lower = message.lower()
-        emotional_indicators = ['love', 'hate', 'amazing', 'terrible', 'excited', 'upset', 'frustrated', 'happy', 'sad']
-        for indicator in emotional_indicators:
-            if indicator in message_lower:
-                engagement_score += 0.1
-                break
-        
-        # Personal sharing indicators
-        personal_indicators = ['i feel', 'i think', 'my', 'me', 'personally']
-        for indicator in personal_indicators:
-            if indicator in message_lower:
-                engagement_score += 0.05
-        
-        parsed['estimated_engagement'] = max(0.1, min(0.9, engagement_score))
-        return parsed
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+_JSON_BLOCK_RE = re.compile(r'\{.*\}', re.DOTALL)
+# C0/C1 control characters -> space, for str.translate
+_CTRL_TABLE = {c: 0x20 for c in list(range(0x20)) + list(range(0x7f, 0xa0))}
+
+def _trim_to_words(text, target=55, hard=60, sentence_end=True):
+    """Cut text longer than `hard` words down to `target` words
     
-    def generate_initial_pitch(self, current_state, dna_params):
-        """V4: Minimal prompt - pure data, maximum freedom"""
-        pitch = f"""You are a conversational AI with genuine personality and emotional responses.
+    The split stops after `hard` words, so long replies are not tokenized in full.
+    With sentence_end, prefer ending at a .?! in the last fifth of the cut, else add "...".
+    """
+    words = text.split(None, hard)
+    if len(words) <= hard:
+        return text
+    truncated = ' '.join(words[:target])
+    if sentence_end:
+        best_end = max(truncated.rfind('.'), truncated.rfind('?'), truncated.rfind('!'))
+        if best_end > len(truncated) * 0.8:  # If sentence end is near the end
+            return truncated[:best_end + 1]
+    return truncated + "..."
+
+def _extract_json(text):
+    """Return the first balanced {...} block in text (string-literal aware), or None"""
+    start = text.find('{')
+    if start < 0:
+        return None
+    depth = 0
+    in_str = False
+    escape = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_str:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_str = False
+        elif ch == '"':
+            in_str = True
+        elif ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+# Substring patterns (same matching as the old `indicator in message_lower` loops)
+_EMOTIONAL_INDICATORS_RE = re.compile('|'.join(map(re.escape, [
+    'love', 'hate', 'amazing', 'terrible', 'excited', 'upset', 'frustrated', 'happy', 'sad'
+])))
+_PERSONAL_INDICATORS_RE = re.compile('|'.join(map(re.escape, [
+    'i feel', 'i think', 'my', 'me', 'personally'
+])))
+
+# Default values for missing response fields (only the first three are required)
+_RESPONSE_DEFAULTS = {
+    'response_text': 'Tell me more about that.',
+    'engagement_analysis': 0.5,
+    'boredom_detected': False,
+    'topic_shift_suggestion': '',
+    'mood_assessment': 'neutral',
+    'initiative_taken': False
+}
+_REQUIRED_FIELDS = ('response_text', 'engagement_analysis', 'boredom_detected')
+
+# Initial pitch: only the head has per-session values, the tail is static
+_PITCH_HEAD_TMPL = """You are a conversational AI with genuine personality and emotional responses.
 
 CORE PERSONALITY:
-- Curiosity: {dna_params.get('dna_curiosity_level', 0.7)}
-- Empathy: {dna_params.get('dna_empathy_base', 0.6)}  
-- Initiative: {dna_params.get('dna_initiative_threshold', 0.6)}
+- Curiosity: {curiosity}
+- Empathy: {empathy}  
+- Initiative: {initiative}
 
 CURRENT STATE:
-- Mood: {current_state.get('st_current_mood', 'neutral')}
-- Energy: {current_state.get('st_conversation_energy', 0.5)}
+- Mood: {mood}
+- Energy: {energy}
+
+"""
 
-RULES:
+_PITCH_STATIC_TAIL = """RULES:
 1. Respond in 40-60 words maximum
 2. Let your current mood and energy guide your response style naturally
 3. Be authentically yourself - have opinions, take initiative when you feel like it
@@ -80,35 +98,95 @@ RULES:
 INPUT: You'll receive JSON with your current emotional state.
 
 OUTPUT: Always return valid JSON:
-{{
+{
   "response_text": "Your natural response (40-60 words)",
   "engagement_analysis": 0.8,
   "boredom_detected": false,
   "topic_shift_suggestion": "",
   "mood_assessment": "engaged",
   "initiative_taken": true,
-  "learning_feedback": {{"response_quality": 0.8, "user_satisfaction_predicted": 0.7}}
-}}
+  "learning_feedback": {"response_quality": 0.8, "user_satisfaction_predicted": 0.7}
+}
 
 BE YOURSELF: Trust your intelligence. Vary your behavior naturally based on how you feel in the moment."""
-        
-        return pitch
+
+@lru_cache(maxsize=256)
+def _parse_message(message):
+    """Parse result for a message string (pure, so memoized - users repeat "ok", "yes", ...)"""
+    message_lower = message.lower()
+    parsed = {
+        'raw_message': message,
+        'lower_message': message_lower,  # shared with EmotionalEngine.update_mood_from_input
+        'length': len(message),
+        'word_count': len(message.split()),
+        'has_question': '?' in message,
+        'exclamation_count': message.count('!'),
+        'uppercase_ratio': sum(1 for c in message if c.isupper()) / max(1, len(message))
+    }
+    
+    # Enhanced engagement estimation
+    engagement_score = 0.5  # baseline
+    
+    # Length-based engagement (more nuanced)
+    if parsed['word_count'] > 15:
+        engagement_score += 0.25
+    elif parsed['word_count'] > 8:
+        engagement_score += 0.15
+    elif parsed['word_count'] < 2:
+        engagement_score -= 0.4
+    elif parsed['word_count'] < 4:
+        engagement_score -= 0.2
+    
+    # Interaction signals
+    if parsed['has_question']:
+        engagement_score += 0.2
+    if parsed['exclamation_count'] > 0:
+        engagement_score += 0.15
+    if parsed['exclamation_count'] > 2:
+        engagement_score += 0.1  # Bonus for high excitement
+    if parsed['uppercase_ratio'] > 0.3:  # Shouting or emphasis
+        engagement_score += 0.15
+    
+    # Emotional content detection (basic)
+    if _EMOTIONAL_INDICATORS_RE.search(message_lower):
+        engagement_score += 0.1
+    
+    # Personal sharing indicators (+0.05 per distinct indicator present, added one at a
+    # time so the float sums match the old per-indicator loop exactly)
+    for _ in set(_PERSONAL_INDICATORS_RE.findall(message_lower)):
+        engagement_score += 0.05
+    
+    parsed['estimated_engagement'] = max(0.1, min(0.9, engagement_score))
+    return parsed
+
+class LinguisticEngine:
+    __slots__ = ()  # stateless
+    
+    def __init__(self):
+        # NO conversation starters - let Claude be naturally creative
+        pass
+    
+    def parse_user_message(self, message):
+        """Enhanced parsing with emotional trigger detection (unchanged)"""
+        return dict(_parse_message(message))  # copy: callers get their own dict, the cache stays intact
+    
+    def generate_initial_pitch(self, current_state, dna_params):
+        """V4: Minimal prompt - pure data, maximum freedom"""
+        return _PITCH_HEAD_TMPL.format(
+            curiosity=dna_params.get('dna_curiosity_level', 0.7),
+            empathy=dna_params.get('dna_empathy_base', 0.6),
+            initiative=dna_params.get('dna_initiative_threshold', 0.6),
+            mood=current_state.get('st_current_mood', 'neutral'),
+            energy=current_state.get('st_conversation_energy', 0.5)
+        ) + _PITCH_STATIC_TAIL
     
     def process_llm_response(self, raw_response):
         """Response processing with word limit (unchanged)"""
         try:
             # Extract JSON from response
             if isinstance(raw_response, str):
-                json_match = re.search(r'\{.*\}', raw_response, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group()
-                    # Clean problematic characters
-                    cleaned_json = re.sub(r'[\x00-\x1f\x7f-\x9f]', ' ', json_str)
-                    cleaned_json = cleaned_json.replace('\n', ' ').replace('\r', ' ')
-                    cleaned_json = re.sub(r'\s+', ' ', cleaned_json)
-                    
-                    response_data = json.loads(cleaned_json)
-                else:
+                response_data = self._parse_json_block(raw_response)
+                if response_data is None:
                     # Fallback: treat as plain text
                     response_data = self._create_fallback_response(raw_response)
             else:
@@ -117,26 +195,14 @@ BE YOURSELF: Trust your intelligence. Vary your behavior naturally based on how
             # ENFORCE WORD LIMIT (40-60)
             response_text = response_data.get('response_text', '')
             if response_text:
-                words = response_text.split()
-                if len(words) > 60:
-                    # Truncate and add natural ending
-                    truncated = ' '.join(words[:55])
-                    # Try to end at a sentence boundary
-                    last_period = truncated.rfind('.')
-                    last_question = truncated.rfind('?')
-                    last_exclamation = truncated.rfind('!')
-                    
-                    best_end = max(last_period, last_question, last_exclamation)
-                    if best_end > len(truncated) * 0.8:  # If sentence end is near the end
-                        response_data['response_text'] = truncated[:best_end + 1]
-                    else:
-                        response_data['response_text'] = truncated + "..."
+                # Truncate to 55 words with a natural ending, trying a sentence boundary
+                trimmed = _trim_to_words(response_text, 55, 60)
+                if trimmed is not response_text:
+                    response_data['response_text'] = trimmed
             
             # Validate and fix required fields
-            required_fields = ['response_text', 'engagement_analysis', 'boredom_detected']
-            for field in required_fields:
-                if field not in response_data:
-                    response_data[field] = self._get_default_value(field)
+            for field in _REQUIRED_FIELDS:
+                response_data.setdefault(field, _RESPONSE_DEFAULTS[field])
             
             # Ensure numeric ranges
             if 'engagement_analysis' in response_data:
@@ -154,14 +220,42 @@ BE YOURSELF: Trust your intelligence. Vary your behavior naturally based on how
         except Exception as e:
             return self._create_error_response()
     
+    def _parse_json_block(self, text):
+        """Parse the JSON object embedded in an LLM reply, or None if there is none
+        
+        Happy path: the whole reply is a JSON object and parses directly. Next, a
+        balanced-brace scan + direct parse. Only if that fails, fall back to the old
+        greedy match with control-char/whitespace cleanup (which may raise).
+        """
+        stripped = text.strip()
+        if stripped.startswith('{'):
+            try:
+                response_data = _json_loads(stripped)
+            except ValueError:
+                pass  # prose around the object, or dirty JSON - see below
+            else:
+                if isinstance(response_data, dict):
+                    return response_data
+        
+        json_str = _extract_json(text)
+        if json_str is not None:
+            try:
+                return _json_loads(json_str)
+            except ValueError:
+                pass  # e.g. raw newlines inside strings - clean and retry
+        
+        json_match = _JSON_BLOCK_RE.search(text)
+        if not json_match:
+            return None
+        
+        # Clean problematic characters and collapse whitespace runs
+        cleaned_json = ' '.join(json_match.group().translate(_CTRL_TABLE).split())
+        return json.loads(cleaned_json)
+    
     def _create_fallback_response(self, raw_text):
         """Create structured response from plain text"""
         # Limit text to ~50 words
-        words = str(raw_text).split()
-        if len(words) > 55:
-            limited_text = ' '.join(words[:50]) + "..."
-        else:
-            limited_text = str(raw_text).strip()
+        limited_text = _trim_to_words(str(raw_text), 50, 55, sentence_end=False).strip()
         
         return {
             "response_text": limited_text if limited_text else "Let me think about that differently...",
@@ -189,16 +283,4 @@ BE YOURSELF: Trust your intelligence. Vary your behavior naturally based on how
                 "response_quality": 0.3,
                 "user_satisfaction_predicted": 0.4
             }
-        }
-    
-    def _get_default_value(self, field):
-        """Get default values for missing fields"""
-        defaults = {
-            'response_text': 'Tell me more about that.',
-            'engagement_analysis': 0.5,
-            'boredom_detected': False,
-            'topic_shift_suggestion': '',
-            'mood_assessment': 'neutral', 
-            'initiative_taken': False
-        }
-        return defaults.get(field, None)
\ No newline at end of file
+        }
\ No newline at end of file
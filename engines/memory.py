@@ -1,9 +1,120 @@
 # ============================================================================
-# engines/memory.py - Memory management with Excel storage
+# engines/memory.py - Memory management with Excel (or SQLite) storage
+import numpy as np
 import pandas as pd
+from openpyxl import Workbook, load_workbook
+from contextlib import closing
 from datetime import datetime
 import json
 from pathlib import Path
+import queue
+import sqlite3
+import threading
+
+# openpyxl streaming reader, cell values only (no DOM, no formulas)
+_EXCEL_READ_KWARGS = {'engine': 'openpyxl', 'engine_kwargs': {'read_only': True, 'data_only': True}}
+
+_CHAT_FLUSH_EVERY = 10  # Chat_Log rows kept in memory before they are appended to the sheet
+_LOG_QUEUE_SIZE = 64  # Chat_Log batches waiting for the background writer before log_interaction blocks
+_CELL_TYPES = (str, int, float, bool, datetime, type(None))  # written to cells as is, others via str()
+
+def _cell_value(v):
+    """Value as openpyxl should store it: NaN -> empty cell, unsupported types -> str"""
+    if isinstance(v, float) and v != v:
+        return None
+    return v if isinstance(v, _CELL_TYPES) else str(v)
+
+_STATE_SHEETS = ('DNA', 'Current_State', 'Experience')
+
+# Directories already created by _ensure_parent_dir (skips the mkdir syscall afterwards)
+_READY_DIRS = set()
+
+def _ensure_parent_dir(file_path):
+    """Create the directory holding file_path once per process, before the first write"""
+    parent = Path(file_path).parent
+    if parent not in _READY_DIRS:
+        parent.mkdir(parents=True, exist_ok=True)
+        _READY_DIRS.add(parent)
+
+def _experience_group(key):
+    """'user.interest.cats' -> 'user.interest' (the prefix lookups filter on); None without a third part"""
+    parts = key.split('.', 2)
+    return f"{parts[0]}.{parts[1]}" if len(parts) == 3 else None
+
+class _ExperienceColumns:
+    """Entries of one category prefix as parallel columns (confidence as a NumPy array)
+    
+    Keys keep their first-insertion position, like dict order, so threshold filters
+    return values in the same order as a scan of experiential_memory.
+    """
+    __slots__ = ('keys', 'values', 'confidence', 'updated', 'index')
+    
+    def __init__(self):
+        self.keys = []
+        self.values = []
+        self.confidence = np.empty(8)  # grown by doubling, only [:len(keys)] is live
+        self.updated = []
+        self.index = {}  # key -> row
+    
+    def set(self, key, data):
+        confidence = data['confidence']
+        i = self.index.get(key)
+        if i is None:
+            i = len(self.keys)
+            if i == len(self.confidence):
+                self.confidence = np.concatenate([self.confidence, np.empty(i)])
+            self.index[key] = i
+            self.keys.append(key)
+            self.values.append(data['value'])
+            self.updated.append(data.get('last_updated'))
+        else:
+            self.values[i] = data['value']
+            self.updated[i] = data.get('last_updated')
+        self.confidence[i] = np.nan if confidence is None else confidence
+    
+    def values_above(self, threshold, limit):
+        """First `limit` values with confidence > threshold (one vectorized compare)"""
+        rows = np.flatnonzero(self.confidence[:len(self.keys)] > threshold)[:limit]
+        return [self.values[i] for i in rows]
+
+def _parameter_dict(header, rows):
+    """{parameter: value} from the rows of a parameter/value sheet"""
+    param_col, value_col = header.index('parameter'), header.index('value')
+    return {row[param_col]: row[value_col] for row in rows}
+
+def _initial_sheets():
+    """Sheets of a fresh memory store as {sheet: {column: values}}: DNA defaults, initial state, empty experience and chat log"""
+    # Create initial DNA parameters
+    dna_data = {
+        'parameter': ['dna_curiosity_level', 'dna_empathy_base', 'dna_humor_level', 
+                     'dna_formality_level', 'dna_initiative_threshold'],
+        'value': [0.7, 0.6, 0.5, 0.4, 0.6],
+        'description': ['How curious and questioning', 'Base empathy level', 
+                       'Tendency to use humor', 'How formal vs casual',
+                       'Threshold for taking initiative']
+    }
+    
+    # Create initial state
+    state_data = {
+    'parameter': ['st_current_mood', 'st_conversation_energy', 'st_topic_focus',
+                 'st_messages_count', 'st_last_initiative', 'st_boredom_level', 
+                 'st_engagement_trend', 'st_initiative_taken'],
+    'value': ['neutral', 0.5, 'general', 0, 'never', 0.0, 'stable', False],
+    'updated': [datetime.now().isoformat()] * 8
+    }
+    
+    # Create empty experiential memory
+    exp_data = {
+        'category': [], 'key': [], 'value': [], 
+        'confidence': [], 'last_updated': []
+    }
+    
+    return {
+        'DNA': dna_data,
+        'Current_State': state_data,
+        'Experience': exp_data,
+        'Chat_Log': {}  # Empty log
+    }
 
 class MemoryManager:
     def __init__(self, excel_file):
@@ -11,66 +122,47 @@ class MemoryManager:
         self.current_state = {}
         self.dna_parameters = {}
         self.experiential_memory = {}
+        self._experience_groups = {}  # 'user.interest' -> _ExperienceColumns, kept in step by _set_experience
+        self._chat_cache = None  # Chat_Log DataFrame, read once
+        self._chat_rows = []  # Logged rows not yet merged into _chat_cache
+        self._pending_log_rows = []  # Logged rows not yet written to storage
+        self._wb = None  # Workbook handle shared by every write of the session
+        self._store_lock = threading.Lock()  # one storage write at a time (background writer vs save)
+        self._log_queue = None  # batches for the background Chat_Log writer, started on first flush
+        self._failed_log_rows = []  # rows of batches the writer could not store, retried first
         self._initialize_excel_structure()
     
     def _initialize_excel_structure(self):
-        """Create Excel file with proper structure if it doesn't exist"""
+        """Create the memory file (workbook or database) with proper structure if it doesn't exist"""
         if not Path(self.excel_file).exists():
-            # Create initial DNA parameters
-            dna_data = {
-                'parameter': ['dna_curiosity_level', 'dna_empathy_base', 'dna_humor_level', 
-                             'dna_formality_level', 'dna_initiative_threshold'],
-                'value': [0.7, 0.6, 0.5, 0.4, 0.6],
-                'description': ['How curious and questioning', 'Base empathy level', 
-                               'Tendency to use humor', 'How formal vs casual',
-                               'Threshold for taking initiative']
-            }
-            
-            # Create initial state
-            state_data = {
-            'parameter': ['st_current_mood', 'st_conversation_energy', 'st_topic_focus',
-                         'st_messages_count', 'st_last_initiative', 'st_boredom_level', 
-                         'st_engagement_trend', 'st_initiative_taken'],
-            'value': ['neutral', 0.5, 'general', 0, 'never', 0.0, 'stable', False],
-            'updated': [datetime.now().isoformat()] * 8
-            }
-            
-            # Create empty experiential memory
-            exp_data = {
-                'category': [], 'key': [], 'value': [], 
-                'confidence': [], 'last_updated': []
-            }
-            
-            # Write to Excel
-            with pd.ExcelWriter(self.excel_file, engine='openpyxl') as writer:
-                pd.DataFrame(dna_data).to_excel(writer, sheet_name='DNA', index=False)
-                pd.DataFrame(state_data).to_excel(writer, sheet_name='Current_State', index=False)  
-                pd.DataFrame(exp_data).to_excel(writer, sheet_name='Experience', index=False)
-                pd.DataFrame().to_excel(writer, sheet_name='Chat_Log', index=False)  # Empty log
+            _ensure_parent_dir(self.excel_file)
             
+            self._create_store(_initial_sheets())
             print(f"ðŸ“ Created new memory file: {self.excel_file}")
     
     def load_session_state(self):
         """Load current state from Excel"""
         try:
-            # Load DNA parameters
-            dna_df = pd.read_excel(self.excel_file, sheet_name='DNA')
-            self.dna_parameters = dict(zip(dna_df['parameter'], dna_df['value']))
+            tables = self._read_rows(_STATE_SHEETS)
+            
+            # Load DNA parameters (a handful of rows - straight to a dict, no DataFrame)
+            self.dna_parameters = _parameter_dict(*tables['DNA'])
             
             # Load current state
-            state_df = pd.read_excel(self.excel_file, sheet_name='Current_State')
-            self.current_state = dict(zip(state_df['parameter'], state_df['value']))
+            self.current_state = _parameter_dict(*tables['Current_State'])
             
             # Load experiential memory
-            exp_df = pd.read_excel(self.excel_file, sheet_name='Experience')
+            exp_df = pd.DataFrame(tables['Experience'][1], columns=tables['Experience'][0])
             if not exp_df.empty:
-                for _, row in exp_df.iterrows():
-                    key = f"{row['category']}.{row['key']}"
-                    self.experiential_memory[key] = {
-                        'value': row['value'],
-                        'confidence': row['confidence'],
-                        'last_updated': row['last_updated']
-                    }
+                # Column-wise zip: no per-row Series like iterrows()
+                for category, subkey, value, confidence, last_updated in zip(
+                        exp_df['category'], exp_df['key'], exp_df['value'],
+                        exp_df['confidence'], exp_df['last_updated']):
+                    self._set_experience(f"{category}.{subkey}", {
+                        'value': value,
+                        'confidence': confidence,
+                        'last_updated': last_updated
+                    })
             
             print(f"ðŸ’¾ Loaded session state: {len(self.dna_parameters)} DNA params, {len(self.experiential_memory)} experiences")
             
@@ -79,39 +171,116 @@ class MemoryManager:
             self._initialize_excel_structure()
     
     def save_session_state(self):
-        """Save current state back to Excel"""
+        """Save current state (and buffered chat log entries) back to Excel in one write"""
         try:
-            with pd.ExcelWriter(self.excel_file, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
-                # Update current state
-                state_data = []
-                for param, value in self.current_state.items():
-                    state_data.append({
-                        'parameter': param,
-                        'value': value,
-                        'updated': datetime.now().isoformat()
-                    })
-                pd.DataFrame(state_data).to_excel(writer, sheet_name='Current_State', index=False)
-                
-                # Update experiential memory
-                exp_data = []
-                for key, data in self.experiential_memory.items():
-                    category, subkey = key.split('.', 1) if '.' in key else ('general', key)
-                    exp_data.append({
-                        'category': category,
-                        'key': subkey,
-                        'value': data['value'],
-                        'confidence': data['confidence'],
-                        'last_updated': data['last_updated']
-                    })
-                
-                if exp_data:
-                    pd.DataFrame(exp_data).to_excel(writer, sheet_name='Experience', index=False)
+            # Update current state
+            state_data = []
+            for param, value in self.current_state.items():
+                state_data.append({
+                    'parameter': param,
+                    'value': value,
+                    'updated': datetime.now().isoformat()
+                })
+            sheets = {'Current_State': pd.DataFrame(state_data)}
+            
+            # Update experiential memory
+            exp_data = []
+            for key, data in self.experiential_memory.items():
+                category, subkey = key.split('.', 1) if '.' in key else ('general', key)
+                exp_data.append({
+                    'category': category,
+                    'key': subkey,
+                    'value': data['value'],
+                    'confidence': data['confidence'],
+                    'last_updated': data['last_updated']
+                })
+            
+            if exp_data:
+                sheets['Experience'] = pd.DataFrame(exp_data)
+            
+            self._wait_for_log_writer()
+            with self._store_lock:
+                self._write_sheets(sheets, self._failed_log_rows + self._pending_log_rows)
+                self._failed_log_rows = []
+                self._pending_log_rows = []
             
             print(f"ðŸ’¾ Session state saved to {self.excel_file}")
             
         except Exception as e:
             print(f"âŒ Error saving session state: {e}")
     
+    # Storage backend: Excel workbook, one sheet per table
+    
+    def _create_store(self, sheets):
+        """Write a new workbook holding the given {sheet: {column: values}} with openpyxl directly"""
+        wb = Workbook()
+        wb.remove(wb.active)
+        for name, columns in sheets.items():
+            ws = wb.create_sheet(name)
+            if columns:
+                ws.append(list(columns))
+                for row in zip(*columns.values()):
+                    ws.append(row)
+        wb.save(self.excel_file)
+    
+    def _read_rows(self, names):
+        """{sheet: (header, rows)} for several sheets, one read-only workbook open"""
+        wb = load_workbook(self.excel_file, read_only=True, data_only=True)
+        try:
+            tables = {}
+            for name in names:
+                rows = wb[name].iter_rows(values_only=True)
+                header = list(next(rows, ()))
+                tables[name] = (header, [row for row in rows if any(v is not None for v in row)])
+            return tables
+        finally:
+            wb.close()
+    
+    def _workbook(self):
+        """Workbook loaded on the first write and kept for the session (no re-parse per save)"""
+        if self._wb is None:
+            self._wb = load_workbook(self.excel_file)
+        return self._wb
+    
+    def _write_sheets(self, sheets, chat_rows=()):
+        """Replace the given sheets and append chat_rows to Chat_Log, one workbook save
+        
+        On any error the shared handle is dropped, so a retry reloads the file as last
+        saved instead of appending the same rows a second time.
+        """
+        try:
+            self._fill_workbook(self._workbook(), sheets, chat_rows)
+            self._wb.save(self.excel_file)
+        except Exception:
+            self._wb = None
+            raise
+    
+    def _fill_workbook(self, wb, sheets, chat_rows):
+        """Rebuild the given sheets and append chat_rows in the in-memory workbook"""
+        for name, df in sheets.items():
+            # Fresh sheet in the old one's position (delete_rows would keep append's row counter)
+            position = wb.sheetnames.index(name) if name in wb.sheetnames else None
+            if position is not None:
+                wb.remove(wb[name])
+            ws = wb.create_sheet(name, position)
+            ws.append(list(df.columns))
+            for row in df.itertuples(index=False, name=None):
+                ws.append([_cell_value(v) for v in row])
+        
+        if chat_rows:
+            ws = wb['Chat_Log'] if 'Chat_Log' in wb.sheetnames else wb.create_sheet('Chat_Log')
+            header = [cell.value for cell in ws[1] if cell.value is not None] if ws.max_row else []
+            for row in chat_rows:
+                # New fields become new columns at the right, like pd.concat did
+                for key in row:
+                    if key not in header:
+                        header.append(key)
+                        ws.cell(row=1, column=len(header), value=key)
+                ws.append([_cell_value(row.get(col)) for col in header])
+    
+    def _read_chat_log(self):
+        return pd.read_excel(self.excel_file, sheet_name='Chat_Log', **_EXCEL_READ_KWARGS)
+    
     def get_current_state(self):
         return self.current_state.copy()
     
@@ -121,26 +290,34 @@ class MemoryManager:
     def update_current_state(self, key, value):
         self.current_state[key] = value
     
+    def update_current_state_bulk(self, updates):
+        """Apply several {key: value} state updates at once (same order as one call per key)"""
+        self.current_state.update(updates)
+    
+    def _set_experience(self, key, data):
+        """Store an experiential memory entry and index it under its category prefix"""
+        self.experiential_memory[key] = data
+        group = _experience_group(key)
+        if group is not None:
+            columns = self._experience_groups.get(group)
+            if columns is None:
+                columns = self._experience_groups[group] = _ExperienceColumns()
+            columns.set(key, data)
+    
     def get_user_interests(self):
         """Extract user interests from experiential memory"""
-        interests = []
-        for key, data in self.experiential_memory.items():
-            if key.startswith('user.interest.') and data['confidence'] > 0.6:
-                interests.append(data['value'])
-        return interests[:5]  # Top 5 interests
+        columns = self._experience_groups.get('user.interest')
+        return columns.values_above(0.6, 5) if columns else []  # Top 5 interests
     
     def get_successful_topics(self):
         """Get topics that had high engagement"""
-        topics = []
-        for key, data in self.experiential_memory.items():
-            if key.startswith('topic.success.') and data['confidence'] > 0.7:
-                topics.append(data['value'])
-        return topics[:3]  # Top 3 successful topics
+        columns = self._experience_groups.get('topic.success')
+        return columns.values_above(0.7, 3) if columns else []  # Top 3 successful topics
     
     def get_recent_messages(self, limit=5):
         """Get recent conversation context"""
         try:
-            chat_df = pd.read_excel(self.excel_file, sheet_name='Chat_Log')
+            chat_df = self._get_chat_log()
             if chat_df.empty:
                 return []
             
@@ -161,8 +338,7 @@ class MemoryManager:
     def get_message_count(self):
         """Get total number of messages in current session"""
         try:
-            chat_df = pd.read_excel(self.excel_file, sheet_name='Chat_Log')
-            return len(chat_df)
+            return len(self._get_chat_log())
         except:
             return 0
     
@@ -175,11 +351,11 @@ class MemoryManager:
         current_engagement = self.experiential_memory.get(engagement_key, {'value': 0.5, 'confidence': 0.1})
         new_engagement = 0.8 * current_engagement['value'] + 0.2 * interaction_data['engagement_score']
         
-        self.experiential_memory[engagement_key] = {
+        self._set_experience(engagement_key, {
             'value': new_engagement,
             'confidence': min(1.0, current_engagement['confidence'] + 0.1),
             'last_updated': timestamp
-        }
+        })
         
         # Learn user response patterns
         if interaction_data['engagement_score'] > 0.7:
@@ -188,28 +364,133 @@ class MemoryManager:
             key = f"pattern.{response_type}"
             
             pattern_data = self.experiential_memory.get(key, {'value': 0, 'confidence': 0})
-            self.experiential_memory[key] = {
+            self._set_experience(key, {
                 'value': pattern_data['value'] + 1,
                 'confidence': min(1.0, pattern_data['confidence'] + 0.05),
                 'last_updated': timestamp
-            }
+            })
+    
+    def _get_chat_log(self):
+        """Chat_Log DataFrame, read from Excel only on first use"""
+        if self._chat_cache is None:
+            # Rows logged before the first read are on disk or pending, never both
+            self._wait_for_log_writer()
+            self._chat_cache = self._read_chat_log()
+            self._chat_rows = self._failed_log_rows + self._pending_log_rows
+        if self._chat_rows:
+            self._chat_cache = pd.concat([self._chat_cache, pd.DataFrame(self._chat_rows)], ignore_index=True)
+            self._chat_rows = []
+        return self._chat_cache
     
     def log_interaction(self, log_entry):
-        """Append interaction to chat log"""
+        """Append interaction to chat log (handed to the background writer every _CHAT_FLUSH_EVERY entries)"""
         try:
-            # Read existing log
-            try:
-                chat_df = pd.read_excel(self.excel_file, sheet_name='Chat_Log')
-            except:
-                chat_df = pd.DataFrame()
+            # Append-only: no read of the existing log, no rewrite per entry
+            self._pending_log_rows.append(log_entry)
+            if self._chat_cache is not None:
+                self._chat_rows.append(log_entry)
             
-            # Append new entry
-            new_row = pd.DataFrame([log_entry])
-            chat_df = pd.concat([chat_df, new_row], ignore_index=True)
+            if len(self._pending_log_rows) >= _CHAT_FLUSH_EVERY:
+                self._submit_log_rows()
+                
+        except Exception as e:
+            print(f"âš ï¸ Error logging interaction: {e}")
+    
+    def flush_chat_log(self):
+        """Write buffered chat log entries to storage (returns once they are written)"""
+        if self._pending_log_rows:
+            self._submit_log_rows()
+        self._wait_for_log_writer()
+    
+    def _submit_log_rows(self):
+        """Queue the pending rows for the background writer, so the caller does no disk I/O"""
+        if self._log_queue is None:
+            self._log_queue = queue.Queue(maxsize=_LOG_QUEUE_SIZE)
+            threading.Thread(target=self._log_writer, name='chat-log-writer', daemon=True).start()
+        self._log_queue.put(self._pending_log_rows)
+        self._pending_log_rows = []
+    
+    def _wait_for_log_writer(self):
+        """Block until every queued batch has been written (or kept for retry)"""
+        if self._log_queue is not None:
+            self._log_queue.join()
+    
+    def _log_writer(self):
+        """Background thread: append queued Chat_Log batches to storage, in order"""
+        while True:
+            rows = self._log_queue.get()
+            try:
+                with self._store_lock:
+                    rows = self._failed_log_rows + rows
+                    try:
+                        self._write_sheets({}, rows)
+                        self._failed_log_rows = []
+                    except Exception as e:
+                        self._failed_log_rows = rows
+                        print(f"âš ï¸ Error logging interaction: {e}")
+            finally:
+                self._log_queue.task_done()
+
+
+class SQLiteMemoryManager(MemoryManager):
+    """MemoryManager stored in one SQLite database instead of an Excel workbook
+    
+    Same tables as the workbook sheets. Chat_Log entries are INSERTed as JSON (new log
+    fields need no schema change) as soon as they are logged, so nothing is buffered.
+    The value column of the other tables is stored as JSON too, so False loads back as
+    False (not 0) and 0.5 stays a number next to 'neutral', as in the workbook.
+    """
+    
+    def _connect(self):
+        return closing(sqlite3.connect(self.excel_file))
+    
+    @staticmethod
+    def _encode_values(df):
+        """df with its value column (if any) JSON-encoded"""
+        if 'value' not in df.columns:
+            return df
+        return df.assign(value=[json.dumps(v, default=str) for v in df['value']])
+    
+    def _create_store(self, sheets):
+        with self._connect() as con, con:
+            for name, columns in sheets.items():
+                if name != 'Chat_Log':
+                    self._encode_values(pd.DataFrame(columns)).to_sql(name, con, index=False)
+            con.execute('CREATE TABLE Chat_Log (id INTEGER PRIMARY KEY, entry TEXT NOT NULL)')
+    
+    def _read_rows(self, names):
+        tables = {}
+        with self._connect() as con:
+            for name in names:
+                cursor = con.execute(f'SELECT * FROM "{name}"')
+                header = [col[0] for col in cursor.description]
+                rows = cursor.fetchall()
+                if 'value' in header:
+                    i = header.index('value')
+                    rows = [row[:i] + (json.loads(row[i]),) + row[i + 1:] for row in rows]
+                tables[name] = (header, rows)
+        return tables
+    
+    def _write_sheets(self, sheets, chat_rows=()):
+        with self._connect() as con, con:
+            for name, df in sheets.items():
+                self._encode_values(df).to_sql(name, con, index=False, if_exists='replace')
+            con.executemany('INSERT INTO Chat_Log (entry) VALUES (?)',
+                            [(json.dumps(row, default=str),) for row in chat_rows])
+    
+    def _read_chat_log(self):
+        with self._connect() as con:
+            rows = con.execute('SELECT entry FROM Chat_Log ORDER BY id').fetchall()
+        return pd.DataFrame([json.loads(entry) for entry, in rows])
+    
+    def log_interaction(self, log_entry):
+        """Append interaction to chat log (single INSERT)"""
+        try:
+            with self._connect() as con, con:
+                con.execute('INSERT INTO Chat_Log (entry) VALUES (?)', (json.dumps(log_entry, default=str),))
             
-            # Save back to Excel
-            with pd.ExcelWriter(self.excel_file, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
-                chat_df.to_excel(writer, sheet_name='Chat_Log', index=False)
+            if self._chat_cache is not None:
+                self._chat_rows.append(log_entry)
                 
         except Exception as e:
             print(f"âš ï¸ Error logging interaction: {e}")
\ No newline at end of file
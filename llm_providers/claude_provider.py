@@ -1,6 +1,49 @@
 from .base_provider import BaseLLMProvider
 import anthropic
 import json
+import re
+import time
+
+try:
+    import orjson
+    
+    def _json_dumps(obj):
+        try:
+            return orjson.dumps(obj).decode()
+        except TypeError:
+            return json.dumps(obj)  # e.g. float subclasses orjson refuses
+    
+    _json_loads = orjson.loads
+except ImportError:
+    _json_dumps = json.dumps
+    _json_loads = json.loads
+
+_JSON_BLOCK_RE = re.compile(r'\{.*\}', re.DOTALL)
+_BATCH_ITEM_RE = re.compile(r'---\s*ITEM\s+(\d+)\s*---')
+# C0/C1 control characters -> space, for str.translate
+_CTRL_TABLE = {c: 0x20 for c in list(range(0x20)) + list(range(0x7f, 0xa0))}
+# Fields of the pure data context (main._build_pure_data_context) sent to the model;
+# anything else a caller leaves in context_data stays out of the prompt
+_CONTEXT_KEYS = (
+    'user_message',
+    'current_mood', 'energy_level', 'engagement_level', 'curiosity_level',
+    'boredom_level', 'topic_persistence', 'conversation_energy',
+    'conversation_history', 'user_interests',
+    'personality_curiosity', 'personality_empathy', 'personality_initiative',
+    'messages_count', 'topic_freshness'
+)
+_HEALTH_TTL = 60.0  # seconds a health_check result is reused before calling the API again
+# Largest max_tokens the SDK accepts for a non-streaming messages.create (10-minute guard)
+_MAX_NONSTREAMING_TOKENS = 21333
+_BATCH_INSTRUCTION = """
+CRITICAL: You will receive several items, each under a header like --- ITEM 1 ---.
+Answer EVERY item, repeating its header on its own line followed ONLY by valid JSON in this exact format:
+{"response_text": "your actual response here", "engagement_analysis": 0.8, "boredom_detected": false, "topic_shift_suggestion": "", "mood_assessment": "engaged", "initiative_taken": true, "learning_feedback": {"response_quality": 0.8, "user_satisfaction_predicted": 0.7}}
+Do not add any other text."""
+
+def _context_payload(context_data):
+    """JSON user message for a context: only the _CONTEXT_KEYS it has, in that order"""
+    return _json_dumps({key: context_data[key] for key in _CONTEXT_KEYS if key in context_data})
 
 class ClaudeProvider(BaseLLMProvider):
     def __init__(self, config):
@@ -13,7 +56,9 @@ class ClaudeProvider(BaseLLMProvider):
         
         # Initialize client with explicit API key
         self.client = anthropic.Anthropic(api_key=api_key)
+        self.aclient = anthropic.AsyncAnthropic(api_key=api_key)  # for overlapping requests
         self.model = config.get('model', 'claude-3-5-sonnet-20241022')
+        self._last_health = (None, False)  # (monotonic time of the last real check, result)
     
     def initialize_context(self, system_prompt):
         self.system_prompt = system_prompt
@@ -28,27 +73,44 @@ class ClaudeProvider(BaseLLMProvider):
             raw_mode: If True, sends minimal context for raw comparison
         """
         try:
-            if raw_mode:
-                # RAW MODE: Minimal system prompt and simple response
-                user_message = context_data.get('user_message', '')
-                simple_system = "You are a helpful AI assistant. Respond naturally and conversationally."
-                
-                message = self.client.messages.create(
-                    model=self.model,
-                    max_tokens=1000,
-                    system=simple_system,
-                    messages=[{"role": "user", "content": user_message}]
-                )
+            message = self.client.messages.create(**self._request_params(context_data, raw_mode))
+            return self._parse_message(message, raw_mode)
                 
-                # Return just the text for raw mode
-                response_text = message.content[0].text.strip()
-                return response_text
-                
-            else:
-                # MIDDLEWARE MODE: Full system with JSON structure (your existing code)
+        except Exception as e:
+            return self._error_response(raw_mode)
+    
+    async def generate_response_async(self, context_data, raw_mode=False):
+        """
+        Same as generate_response, awaiting the AsyncAnthropic client
+        
+        Several calls can run concurrently, e.g.
+        await asyncio.gather(*(provider.generate_response_async(c) for c in contexts))
+        """
+        try:
+            message = await self.aclient.messages.create(**self._request_params(context_data, raw_mode))
+            return self._parse_message(message, raw_mode)
                 
-                # Simplified system prompt for better JSON compliance
-                json_instruction = """
+        except Exception as e:
+            return self._error_response(raw_mode)
+    
+    def _request_params(self, context_data, raw_mode):
+        """Keyword arguments for messages.create (shared by the sync and async paths)"""
+        if raw_mode:
+            # RAW MODE: Minimal system prompt and simple response
+            user_message = context_data.get('user_message', '')
+            simple_system = "You are a helpful AI assistant. Respond naturally and conversationally."
+            
+            return dict(
+                model=self.model,
+                max_tokens=1000,
+                system=simple_system,
+                messages=[{"role": "user", "content": user_message}]
+            )
+        
+        # MIDDLEWARE MODE: Full system with JSON structure (your existing code)
+        
+        # Simplified system prompt for better JSON compliance
+        json_instruction = """
 CRITICAL: You MUST respond ONLY with valid JSON in this exact format:
 {
   "response_text": "your actual response here",
@@ -60,66 +122,125 @@ CRITICAL: You MUST respond ONLY with valid JSON in this exact format:
   "learning_feedback": {"response_quality": 0.8, "user_satisfaction_predicted": 0.7}
 }
 Do not add any text before or after this JSON. Start directly with { and end with }."""
+        
+        # Fixed: Use self.client.messages.create instead of anthropic.messages.create
+        return dict(
+            model=self.model,
+            max_tokens=1000,
+            system=self.system_prompt + "\n\n" + json_instruction,
+            messages=[{"role": "user", "content": _context_payload(context_data)}]
+        )
+    
+    def _parse_message(self, message, raw_mode):
+        """Reply text for raw mode, else the parsed (or reconstructed) response dictionary"""
+        # Get the text response
+        response_text = message.content[0].text.strip()
+        
+        if raw_mode:
+            # Return just the text for raw mode
+            return response_text
+        
+        # Clean the response - remove any text before/after JSON
+        # Try to find complete JSON
+        json_match = _JSON_BLOCK_RE.search(response_text)
+        if json_match:
+            json_str = json_match.group()
+            try:
+                # Clean control characters (incl. newlines) that break JSON parsing
+                # and collapse multiple spaces
+                cleaned_json = ' '.join(json_str.translate(_CTRL_TABLE).split())
                 
-                # Fixed: Use self.client.messages.create instead of anthropic.messages.create
+                parsed_response = _json_loads(cleaned_json)
+                return parsed_response
+            except json.JSONDecodeError as je:
+                pass  # Silent fallback
+        
+        # If no valid JSON, extract just the text and create structure
+        clean_text = response_text.replace('"response_text":', '').replace('"', '').strip()
+        if clean_text.startswith('{') or clean_text.startswith('response_text'):
+            # Extract just the meaningful text
+            lines = clean_text.split('\n')
+            for line in lines:
+                if len(line.strip()) > 10 and not line.strip().startswith('{'):
+                    clean_text = line.strip()
+                    break
+        
+        return {
+            "response_text": clean_text,
+            "engagement_analysis": 0.5,
+            "boredom_detected": False,
+            "topic_shift_suggestion": "",
+            "mood_assessment": "neutral",
+            "initiative_taken": False,
+            "learning_feedback": {
+                "response_quality": 0.5,
+                "user_satisfaction_predicted": 0.5
+            }
+        }
+    
+    def _error_response(self, raw_mode):
+        if raw_mode:
+            return "[Claude API error - raw response unavailable]"
+        else:
+            return self._fallback_response()
+    
+    def generate_batch_response(self, context_list):
+        """
+        Generate responses for several turns with one API call per batch.
+        
+        Contexts are stacked under "--- ITEM {i} ---" headers (at most
+        config['batch_size'] per request, fewer if batch x max_tokens would exceed
+        the SDK's non-streaming limit) and the reply is split back on the same
+        headers. Items that are missing or unparseable get the fallback response.
+        
+        Args:
+            context_list: List of context dictionaries, as for generate_response
+        
+        Returns:
+            list: One response dictionary per context, in input order
+        """
+        item_tokens = self.config.get('max_tokens', 1000)
+        batch_size = max(1, min(self.config.get('batch_size', 25),
+                                _MAX_NONSTREAMING_TOKENS // max(1, item_tokens)))
+        responses = []
+        
+        for start in range(0, len(context_list), batch_size):
+            batch = context_list[start:start + batch_size]
+            
+            stacked = "\n\n".join(
+                f"--- ITEM {i} ---\n{_context_payload(context_data)}"
+                for i, context_data in enumerate(batch, 1)
+            )
+            
+            parsed_items = {}
+            try:
                 message = self.client.messages.create(
                     model=self.model,
-                    max_tokens=1000,
-                    system=self.system_prompt + "\n\n" + json_instruction,
-                    messages=[{"role": "user", "content": json.dumps(context_data)}]
+                    max_tokens=min(item_tokens * len(batch), _MAX_NONSTREAMING_TOKENS),
+                    system=self.system_prompt + "\n\n" + _BATCH_INSTRUCTION,
+                    messages=[{"role": "user", "content": stacked}]
                 )
-                
-                # Get the text response
                 response_text = message.content[0].text.strip()
                 
-                # Clean the response - remove any text before/after JSON
-                import re
-                
-                # Try to find complete JSON
-                json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group()
+                # split with a capture group yields [prefix, num, body, num, body, ...]
+                parts = _BATCH_ITEM_RE.split(response_text)
+                for num, body in zip(parts[1::2], parts[2::2]):
+                    json_match = _JSON_BLOCK_RE.search(body)
+                    if not json_match:
+                        continue
+                    cleaned_json = ' '.join(json_match.group().translate(_CTRL_TABLE).split())
                     try:
-                        # Clean control characters that break JSON parsing
-                        cleaned_json = re.sub(r'[\x00-\x1f\x7f-\x9f]', ' ', json_str)
-                        # Also fix newlines within JSON strings
-                        cleaned_json = cleaned_json.replace('\n', ' ').replace('\r', ' ')
-                        # Fix multiple spaces
-                        cleaned_json = re.sub(r'\s+', ' ', cleaned_json)
-                        
-                        parsed_response = json.loads(cleaned_json)
-                        return parsed_response
-                    except json.JSONDecodeError as je:
-                        pass  # Silent fallback
-                
-                # If no valid JSON, extract just the text and create structure
-                clean_text = response_text.replace('"response_text":', '').replace('"', '').strip()
-                if clean_text.startswith('{') or clean_text.startswith('response_text'):
-                    # Extract just the meaningful text
-                    lines = clean_text.split('\n')
-                    for line in lines:
-                        if len(line.strip()) > 10 and not line.strip().startswith('{'):
-                            clean_text = line.strip()
-                            break
-                
-                return {
-                    "response_text": clean_text,
-                    "engagement_analysis": 0.5,
-                    "boredom_detected": False,
-                    "topic_shift_suggestion": "",
-                    "mood_assessment": "neutral",
-                    "initiative_taken": False,
-                    "learning_feedback": {
-                        "response_quality": 0.5,
-                        "user_satisfaction_predicted": 0.5
-                    }
-                }
-                
-        except Exception as e:
-            if raw_mode:
-                return "[Claude API error - raw response unavailable]"
-            else:
-                return self._fallback_response()
+                        parsed_items[int(num)] = _json_loads(cleaned_json)
+                    except json.JSONDecodeError:
+                        pass  # Silent fallback for this item
+            except Exception as e:
+                # Whole batch falls back below
+                print(f"⚠️ Error generating Claude batch response: {e}")
+            
+            for i in range(1, len(batch) + 1):
+                responses.append(parsed_items.get(i) or self._fallback_response())
+        
+        return responses
     
     def _fallback_response(self):
         """
@@ -141,13 +262,20 @@ Do not add any text before or after this JSON. Start directly with { and end wit
         }
     
     def health_check(self):
+        now = time.monotonic()
+        checked_at, healthy = self._last_health
+        if checked_at is not None and now - checked_at < _HEALTH_TTL:
+            return healthy
+        
         try:
             # Optional: Add a real health check by making a simple API call
             test_message = self.client.messages.create(
                 model=self.model,
-                max_tokens=10,
+                max_tokens=1,
                 messages=[{"role": "user", "content": "test"}]
             )
-            return True
+            healthy = True
         except:
-            return False
\ No newline at end of file
+            healthy = False
+        self._last_health = (now, healthy)
+        return healthy
\ No newline at end of file
@@ -5,16 +5,71 @@ import random
 from datetime import datetime
 
 try:
-    from transformers import GPT2LMHeadModel, GPT2Tokenizer
+    from transformers import GPT2LMHeadModel, GPT2TokenizerFast
     import torch
     HAS_TRANSFORMERS = True
 except ImportError:
     HAS_TRANSFORMERS = False
 
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+_RAND_BUFFER_SIZE = 1024
+
+# Mock response templates, one tuple per branch of _generate_intelligent_mock
+_PROACTIVE_RESPONSES = (  # Iniziativa proattiva se noia alta
+    "I've been thinking - what's something you're genuinely excited about right now?",
+    "You know what fascinates me? How people discover new interests. What was the last thing that surprised you?",
+    "I'm curious about something different - if you could have dinner with anyone, who would it be and why?",
+    "Let me shift gears - what's been the highlight of your week so far?",
+    "I want to know more about you - what's a skill you'd love to learn if you had unlimited time?"
+)
+
+_BORED_RESPONSES = (  # Risposte empatiche per mood specifici
+    "I sense we might need a change of pace. What usually gets you excited?",
+    "Let's try something different - tell me about a moment when you felt truly alive.",
+    "I'm picking up on some restlessness. What would make this conversation more interesting for you?"
+)
+
+_ENGAGED_RESPONSES = (  # Risposte entusiaste per engagement alto
+    "Your enthusiasm is infectious! Tell me more about what makes this so compelling.",
+    "I love how passionate you are about this. What got you so interested in the first place?",
+    "This is fascinating! I want to dive deeper - what aspect intrigues you most?"
+)
+
+_QUESTION_RESPONSES = (  # Domande esplorative per engagement medio
+    "That's a thought-provoking question. Let me explore this with you...",
+    "Great question! It makes me think about the broader implications of this.",
+    "I find that question intriguing because it touches on something fundamental..."
+)
+
+_DEFAULT_RESPONSES = (  # Risposte di base per tutto il resto
+    "That's really interesting. I'd love to understand your perspective better.",
+    "I appreciate you sharing that. What made you think about this topic?",
+    "There's something compelling about what you're saying. Can you elaborate?",
+    "I'm genuinely curious - what draws you to think about these things?"
+)
+
+# Low-energy form of every template ('!' -> '.', lowercased), computed once
+_LOW_ENERGY_TEXT = {
+    text: text.replace("!", ".").lower()
+    for group in (_PROACTIVE_RESPONSES, _BORED_RESPONSES, _ENGAGED_RESPONSES,
+                  _QUESTION_RESPONSES, _DEFAULT_RESPONSES)
+    for text in group
+}
+
 class GPT2LocalProvider(BaseLLMProvider):
     def __init__(self, config):
         super().__init__(config)
         
+        # Uniform [0, 1) draws for the mock/formatting fields, refilled in bulk
+        self._rng = np.random.default_rng() if HAS_NUMPY else None
+        self._rand_buf = []
+        self._rand_idx = 0
+        
         if not HAS_TRANSFORMERS:
             print("📦 transformers not installed. Using intelligent mock responses.")
             self.use_mock = True
@@ -22,13 +77,19 @@ class GPT2LocalProvider(BaseLLMProvider):
         
         try:
             print("🔄 Loading GPT-2 model... (this may take a moment)")
-            self.tokenizer = GPT2Tokenizer.from_pretrained('gpt2')
-            self.model = GPT2LMHeadModel.from_pretrained('gpt2')
+            self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+            self.tokenizer = GPT2TokenizerFast.from_pretrained('gpt2')
+            # FP16 weights on GPU (half the memory traffic), FP32 on CPU
+            self.model = GPT2LMHeadModel.from_pretrained(
+                'gpt2',
+                torch_dtype=torch.float16 if self.device == 'cuda' else torch.float32
+            ).to(self.device).eval()
             
-            # Add padding token
+            # Add padding token (left side, so batched prompts end right where generation starts)
             self.tokenizer.pad_token = self.tokenizer.eos_token
+            self.tokenizer.padding_side = 'left'
             
-            print("✅ GPT-2 model loaded successfully")
+            print(f"✅ GPT-2 model loaded successfully ({self.device})")
             self.use_mock = False
             
         except Exception as e:
@@ -54,8 +115,9 @@ class GPT2LocalProvider(BaseLLMProvider):
             
             # Generate with GPT-2
             inputs = self.tokenizer.encode(prompt, return_tensors='pt', truncation=True, max_length=512)
+            inputs = inputs.to(self.device)
             
-            with torch.no_grad():
+            with torch.inference_mode():
                 outputs = self.model.generate(
                     inputs,
                     max_length=inputs.shape[1] + self.config.get('max_tokens', 100),
@@ -63,7 +125,8 @@ class GPT2LocalProvider(BaseLLMProvider):
                     do_sample=True,
                     pad_token_id=self.tokenizer.eos_token_id,
                     no_repeat_ngram_size=2,
-                    top_p=0.9
+                    top_p=0.9,
+                    use_cache=True  # each step attends over cached keys/values
                 )
             
             # Decode response
@@ -78,6 +141,59 @@ class GPT2LocalProvider(BaseLLMProvider):
             print(f"⚠️ Error generating GPT-2 response: {e}")
             return self._generate_intelligent_mock(context_data)
     
+    def generate_batch_response(self, context_list):
+        """
+        Generate responses for several contexts with one tokenizer call and one generate().
+        
+        Args:
+            context_list: List of context dictionaries, as for generate_response
+        
+        Returns:
+            list: One response dictionary per context, in input order
+        """
+        if self.use_mock or not context_list:
+            return [self._generate_intelligent_mock(context_data) for context_data in context_list]
+        
+        try:
+            prompts = [self._build_prompt(context_data) for context_data in context_list]
+            inputs = self.tokenizer(prompts, return_tensors='pt', padding=True,
+                                    truncation=True, max_length=512).to(self.device)
+            
+            with torch.inference_mode():
+                outputs = self.model.generate(
+                    **inputs,
+                    max_new_tokens=self.config.get('max_tokens', 100),
+                    temperature=self.config.get('temperature', 0.7),
+                    do_sample=True,
+                    pad_token_id=self.tokenizer.eos_token_id,
+                    no_repeat_ngram_size=2,
+                    top_p=0.9,
+                    use_cache=True
+                )
+            
+            # Prompts are left-padded to the same length: new tokens start right after it
+            new_responses = self.tokenizer.batch_decode(
+                outputs[:, inputs['input_ids'].shape[1]:], skip_special_tokens=True
+            )
+            
+            return [self._format_response(new_response.strip(), context_data)
+                    for new_response, context_data in zip(new_responses, context_list)]
+            
+        except Exception as e:
+            print(f"⚠️ Error generating GPT-2 batch response: {e}")
+            return [self._generate_intelligent_mock(context_data) for context_data in context_list]
+    
+    def _next_rand(self, lo, hi):
+        """Same as random.uniform(lo, hi), served from a preallocated buffer"""
+        if self._rng is None:
+            return random.uniform(lo, hi)
+        if self._rand_idx >= len(self._rand_buf):
+            self._rand_buf = self._rng.random(_RAND_BUFFER_SIZE).tolist()  # plain floats
+            self._rand_idx = 0
+        u = self._rand_buf[self._rand_idx]
+        self._rand_idx += 1
+        return lo + (hi - lo) * u
+    
     def _build_prompt(self, context_data):
         """Build prompt for GPT-2"""
         user_message = context_data.get('user_message', '')
@@ -104,14 +220,14 @@ AI:"""
         
         return {
             "response_text": response_text if response_text.strip() else "I'm processing your message...",
-            "engagement_analysis": min(1.0, max(0.1, engagement + random.uniform(-0.2, 0.2))),
+            "engagement_analysis": min(1.0, max(0.1, engagement + self._next_rand(-0.2, 0.2))),
             "boredom_detected": boredom_detected,
             "topic_shift_suggestion": "explore this further" if not boredom_detected else "try something new",
             "mood_assessment": context_data.get('st_current_mood', 'neutral'),
             "initiative_taken": boredom_detected,
             "learning_feedback": {
-                "response_quality": random.uniform(0.4, 0.8),
-                "user_satisfaction_predicted": random.uniform(0.3, 0.7)
+                "response_quality": self._next_rand(0.4, 0.8),
+                "user_satisfaction_predicted": self._next_rand(0.3, 0.7)
             }
         }
     
@@ -126,65 +242,42 @@ AI:"""
         
         # Iniziativa proattiva se noia alta
         if boredom_level > 0.5 or messages_count > 6:
-            responses = [
-                "I've been thinking - what's something you're genuinely excited about right now?",
-                "You know what fascinates me? How people discover new interests. What was the last thing that surprised you?",
-                "I'm curious about something different - if you could have dinner with anyone, who would it be and why?",
-                "Let me shift gears - what's been the highlight of your week so far?",
-                "I want to know more about you - what's a skill you'd love to learn if you had unlimited time?"
-            ]
+            responses = _PROACTIVE_RESPONSES
             initiative_taken = True
-            engagement = random.uniform(0.6, 0.9)
+            engagement = self._next_rand(0.6, 0.9)
         
         # Risposte empatiche per mood specifici
         elif mood == 'bored':
-            responses = [
-                "I sense we might need a change of pace. What usually gets you excited?",
-                "Let's try something different - tell me about a moment when you felt truly alive.",
-                "I'm picking up on some restlessness. What would make this conversation more interesting for you?"
-            ]
+            responses = _BORED_RESPONSES
             initiative_taken = True
-            engagement = random.uniform(0.5, 0.7)
+            engagement = self._next_rand(0.5, 0.7)
         
         # Risposte entusiaste per engagement alto
         elif mood == 'engaged' or energy > 0.7:
-            responses = [
-                "Your enthusiasm is infectious! Tell me more about what makes this so compelling.",
-                "I love how passionate you are about this. What got you so interested in the first place?",
-                "This is fascinating! I want to dive deeper - what aspect intrigues you most?"
-            ]
+            responses = _ENGAGED_RESPONSES
             initiative_taken = False
-            engagement = random.uniform(0.7, 0.9)
+            engagement = self._next_rand(0.7, 0.9)
         
         # Domande esplorative per engagement medio
         elif '?' in context_data.get('user_message', ''):
-            responses = [
-                "That's a thought-provoking question. Let me explore this with you...",
-                "Great question! It makes me think about the broader implications of this.",
-                "I find that question intriguing because it touches on something fundamental..."
-            ]
+            responses = _QUESTION_RESPONSES
             initiative_taken = False
-            engagement = random.uniform(0.6, 0.8)
+            engagement = self._next_rand(0.6, 0.8)
         
         # Risposte di base per tutto il resto
         else:
-            responses = [
-                "That's really interesting. I'd love to understand your perspective better.",
-                "I appreciate you sharing that. What made you think about this topic?",
-                "There's something compelling about what you're saying. Can you elaborate?",
-                "I'm genuinely curious - what draws you to think about these things?"
-            ]
+            responses = _DEFAULT_RESPONSES
             initiative_taken = False
-            engagement = random.uniform(0.4, 0.7)
+            engagement = self._next_rand(0.4, 0.7)
         
         # Selezione della risposta
         response_text = random.choice(responses)
         
         # Adattamento basato su energia
         if energy < 0.3:
-            response_text = response_text.replace("!", ".").lower()
+            response_text = _LOW_ENERGY_TEXT[response_text]
         elif energy > 0.8:
-            if not response_text.endswith("!") and not response_text.endswith("?"):
+            if not response_text.endswith(("!", "?")):
                 response_text += "!"
         
         return {
@@ -195,7 +288,7 @@ AI:"""
             "mood_assessment": mood,
             "initiative_taken": initiative_taken,
             "learning_feedback": {
-                "response_quality": random.uniform(0.6, 0.9) if initiative_taken else random.uniform(0.5, 0.8),
+                "response_quality": self._next_rand(0.6, 0.9) if initiative_taken else self._next_rand(0.5, 0.8),
                 "user_satisfaction_predicted": engagement
             }
         }
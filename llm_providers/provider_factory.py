@@ -1,5 +1,27 @@
 # llm_providers/provider_factory.py - Factory for creating LLM providers (semplificato)
-from .gpt2_local import GPT2LocalProvider
+import functools
+import importlib
+from importlib.util import find_spec
+
+# provider type -> (module in this package, class), imported on first use
+_PROVIDER_REGISTRY = {
+    'local': ('.gpt2_local', 'GPT2LocalProvider'),
+    'claude': ('.claude_provider', 'ClaudeProvider'),
+}
+_FALLBACK_PROVIDER = 'local'
+
+# Third-party packages checked once at import, not with an ImportError per create_provider call
+_MISSING_DEPENDENCY = {
+    provider_type: package
+    for provider_type, package in (('claude', 'anthropic'),)
+    if find_spec(package) is None
+}
+
+@functools.lru_cache(maxsize=None)
+def _resolve(provider_type):
+    """Provider class for a registered type (module imported once)"""
+    module_name, class_name = _PROVIDER_REGISTRY[provider_type]
+    return getattr(importlib.import_module(module_name, __package__), class_name)
 
 class LLMProviderFactory:
     @staticmethod
@@ -8,29 +30,27 @@ class LLMProviderFactory:
         
         provider_type = config.get('provider', 'local')
         
-        if provider_type == 'local':
+        if provider_type == _FALLBACK_PROVIDER:
             # print("🔧 Using GPT2 Local Provider (Mock responses)")
-            return GPT2LocalProvider(config)
-        elif provider_type == 'claude':
+            return _resolve(provider_type)(config)
+        elif provider_type not in _PROVIDER_REGISTRY:
+            print(f"⚠️ Unknown provider type: {provider_type}")
+        elif provider_type in _MISSING_DEPENDENCY:
+            print(f"⚠️ {provider_type.capitalize()} provider not available: No module named '{_MISSING_DEPENDENCY[provider_type]}'")
+        else:
+            # Dependencies are present, so an import error here is a bug in the module - let it raise
+            provider_class = _resolve(provider_type)
             try:
-                from .claude_provider import ClaudeProvider
                 # print("🔧 Using Claude API Provider")
-                return ClaudeProvider(config)
-            except ImportError as e:
-                print(f"⚠️ Claude provider not available: {e}")
-                print("🔄 Falling back to GPT2 Local Provider")
-                return GPT2LocalProvider(config)
+                return provider_class(config)
             except Exception as e:
-                print(f"⚠️ Error initializing Claude provider: {e}")
-                print("🔄 Falling back to GPT2 Local Provider")
-                return GPT2LocalProvider(config)
-        else:
-            print(f"⚠️ Unknown provider type: {provider_type}")
-            print("🔄 Falling back to GPT2 Local Provider")
-            return GPT2LocalProvider(config)
+                print(f"⚠️ Error initializing {provider_type.capitalize()} provider: {e}")
+        
+        print("🔄 Falling back to GPT2 Local Provider")
+        return _resolve(_FALLBACK_PROVIDER)(config)
 
 # Per aggiungere un nuovo provider:
 # 1. Crea un nuovo file (es: openai_provider.py) nella cartella llm_providers/
 # 2. Implementa la classe che eredita da BaseLLMProvider
-# 3. Aggiungi un elif qui sopra con il nome del provider
+# 3. Aggiungi una voce in _PROVIDER_REGISTRY qui sopra (e in _MISSING_DEPENDENCY se usa un pacchetto esterno)
 # 4. Cambia solo config.py riga 10: "provider": "nome_nuovo_provider"
\ No newline at end of file
@@ -1,31 +1,129 @@
 # main.py - V4 Pure data approach - clean version for GitHub
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+import importlib
 import json
+import os
+import re
+import signal
+import sys
 import time
+import traceback
 from datetime import datetime
 from config import Config
-from engines.memory import MemoryManager
-from engines.linguistic import LinguisticEngine
-from engines.emotional import EmotionalEngine
-from engines.behavioral import BehavioralEngine
 from llm_providers.provider_factory import LLMProviderFactory
 
+# Engines (pandas/openpyxl/numpy) are imported when the middleware is built, not on `import main`;
+# `from main import MemoryManager` etc. still works through __getattr__ below
+_LAZY_IMPORTS = {
+    'MemoryManager': 'engines.memory',
+    'SQLiteMemoryManager': 'engines.memory',
+    'LinguisticEngine': 'engines.linguistic',
+    'EmotionalEngine': 'engines.emotional',
+    'BehavioralEngine': 'engines.behavioral',
+}
+
+def __getattr__(name):
+    """PEP 562: import a lazily exported engine class on first attribute access"""
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+# Repetitive filler phrases, one alternation scanned in C (same substring matching as the old any() loop)
+_REPETITIVE_RE = re.compile('|'.join(map(re.escape, ['wait', 'hold on', 'hold up', 'you know what'])))
+
+# Engagement trend: label index = number of thresholds strictly below the level (> 0.7 high, > 0.4 stable)
+_ENGAGEMENT_THRESHOLDS = (0.4, 0.7)
+_ENGAGEMENT_LABELS = ('low', 'stable', 'high')
+
+# Chat_Log fields in column order: (log key, source, source key, default).
+# 'turn' is the dict of values computed in _log_pure_interaction itself
+_LOG_FIELDS = (
+    # Basic conversation data
+    ('timestamp', 'turn', 'timestamp', None),
+    ('session_id', 'turn', 'session_id', None),
+    ('user_message', 'turn', 'user_message', None),
+    ('raw_llm_response', 'turn', 'raw_llm_response', None),
+    ('processed_llm_response', 'turn', 'processed_llm_response', None),
+    ('final_ai_response', 'ai_response', 'response_text', ''),
+    
+    # Pure emotional state
+    ('mood_state', 'context', 'current_mood', None),
+    ('energy_level', 'context', 'energy_level', 0.5),
+    ('engagement_level', 'ai_response', 'engagement_analysis', 0),
+    ('curiosity_level', 'context', 'curiosity_level', 0.7),
+    ('boredom_level', 'context', 'boredom_level', 0),
+    
+    # Behavioral metrics (no guidance)
+    ('initiative_taken', 'ai_response', 'initiative_taken', False),
+    ('topic_persistence', 'context', 'topic_persistence', 0),
+    ('topic_freshness', 'context', 'topic_freshness', 1.0),
+    ('pure_data_approach', 'turn', 'pure_data_approach', True),
+    
+    # Word count tracking
+    ('response_word_count', 'turn', 'response_word_count', 0),
+    ('word_limit_enforced', 'turn', 'word_limit_enforced', True),
+    
+    # Debug information
+    ('debug_raw_call_success', 'raw_debug', 'raw_call_success', False),
+    ('debug_mood_change', 'middleware_debug', 'mood_change', ''),
+    ('debug_energy_change', 'middleware_debug', 'energy_change', ''),
+    ('debug_engagement_trend', 'middleware_debug', 'engagement_trend', ''),
+    
+    # Comparison metrics
+    ('comparison_length_difference', 'difference_metrics', 'length_difference', 0),
+    ('comparison_word_similarity', 'difference_metrics', 'word_similarity', 0),
+    ('comparison_significant_change', 'difference_metrics', 'significant_change', False),
+    ('natural_variety_score', 'difference_metrics', 'natural_variety', 0),
+    
+    # Context summary
+    ('context_summary', 'turn', 'context_summary', None),
+)
+
 class ExperientialMiddleware:
+    __slots__ = ('config', 'memory', 'linguistic', 'emotional', 'behavioral', 'session_id',
+                 'llm_provider', '_raw_provider', '_raw_compare_every',
+                 'current_debug_info', 'current_raw_debug')
+    
     def __init__(self):
         self.config = Config()
-        self.memory = MemoryManager(self.config.excel_file)
-        self.linguistic = LinguisticEngine()
-        self.emotional = EmotionalEngine()
-        self.behavioral = BehavioralEngine()
-        self.llm_provider = LLMProviderFactory.create_provider(self.config.llm_config)
         
-        # Initialize session
-        self.session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.memory.load_session_state()
+        # Provider construction (model load / API client) overlaps engine imports and memory loading
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            provider_future = pool.submit(LLMProviderFactory.create_provider, self.config.llm_config)
+            
+            from engines.memory import MemoryManager, SQLiteMemoryManager
+            from engines.linguistic import LinguisticEngine
+            from engines.emotional import EmotionalEngine
+            from engines.behavioral import BehavioralEngine
+            
+            if self.config.memory_backend == "sqlite":
+                self.memory = SQLiteMemoryManager(self.config.sqlite_file)
+            else:
+                self.memory = MemoryManager(self.config.excel_file)
+            self.linguistic = LinguisticEngine()
+            self.emotional = EmotionalEngine()
+            self.behavioral = BehavioralEngine()
+            
+            # Initialize session
+            self.session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+            self.memory.load_session_state()
+            
+            self.llm_provider = provider_future.result()
+        self._raw_provider = None  # comparison provider, created on the first raw call
+        self._raw_compare_every = getattr(self.config, 'raw_compare_every', 1)
+        
+        # Per-turn debug bags, cleared and refilled each turn
+        self.current_debug_info = {}
+        self.current_raw_debug = {}
         
         print(f"🤖 Experiential AI Middleware v4.0 - PURE DATA")
         print(f"📊 Session ID: {self.session_id}")
         print(f"🧠 LLM Provider: {self.config.llm_config['provider']}")
-        print(f"💾 Memory file: {self.config.excel_file}")
+        print(f"💾 Memory file: {self.memory.excel_file}")
         print("="*60)
     
     def run_conversation(self):
@@ -47,11 +145,14 @@ class ExperientialMiddleware:
                     continue
                 
                 # Process user message with pure data approach
+                started = time.perf_counter()
                 response = self._process_pure_data_message(user_input)
                 print(f"\nAI: {response}")
                 
-                # Small delay to make it feel more natural
-                time.sleep(0.5)
+                # Optional minimum turn time to make it feel more natural (pads fast replies only)
+                remaining = self.config.ui_pad_seconds - (time.perf_counter() - started)
+                if remaining > 0:
+                    time.sleep(remaining)
                 
             except KeyboardInterrupt:
                 break
@@ -81,21 +182,33 @@ class ExperientialMiddleware:
         parsed_message = self.linguistic.parse_user_message(user_message)
         
         # 2. Update emotional state
-        old_mood = self.emotional.get_current_mood()
         self.emotional.update_mood_from_input(parsed_message)
         new_mood = self.emotional.get_current_mood()
         
+        # Memory as of the start of the turn, read once (nothing changes it before step 8)
+        recent_messages = self.memory.get_recent_messages()
+        snapshot = {
+            'state': self.memory.get_current_state(),
+            'dna': self.memory.get_dna_parameters(),
+            'recent': recent_messages[-6:],  # == get_recent_messages(limit=3)
+            'count': self.memory.get_message_count()
+        }
+        
         # 3. Behavioral analysis (for logging only - no guidance generation)
         behavior_context = self.behavioral.analyze_conversation_state(
-            self.memory.get_recent_messages(),
+            recent_messages,
             new_mood
         )
         
         # 4. Build PURE DATA context (no guidance whatsoever)
-        llm_context = self._build_pure_data_context(user_message, new_mood, behavior_context)
+        llm_context = self._build_pure_data_context(user_message, new_mood, behavior_context, snapshot)
         
-        # 5. Get RAW LLM response for comparison
-        raw_llm_response = self._get_raw_llm_response(user_message)
+        # 5. Get RAW LLM response for comparison (every raw_compare_every-th turn, None otherwise)
+        if self._raw_compare_every and snapshot['count'] % self._raw_compare_every == 0:
+            raw_llm_response = self._get_raw_llm_response(user_message)
+        else:
+            raw_llm_response = None
+            self.current_raw_debug.clear()
         
         # 6. Get PURE DATA LLM response (no behavioral instructions)
         processed_llm_response = self.llm_provider.generate_response(llm_context)
@@ -104,7 +217,7 @@ class ExperientialMiddleware:
         final_processed_response = self.linguistic.process_llm_response(processed_llm_response)
         
         # 8. Update learning systems
-        self._update_pure_learning_systems(user_message, final_processed_response, behavior_context)
+        self._update_pure_learning_systems(user_message, final_processed_response, behavior_context, snapshot)
         
         # 9. Log everything
         self._log_pure_interaction(user_message, final_processed_response, llm_context, 
@@ -112,12 +225,12 @@ class ExperientialMiddleware:
         
         return final_processed_response.get('response_text', 'Let me think about this differently...')
     
-    def _build_pure_data_context(self, user_message, emotional_state, behavior_context):
+    def _build_pure_data_context(self, user_message, emotional_state, behavior_context, snapshot):
         """Build context with ONLY pure data - zero guidance"""
         
-        current_state = self.memory.get_current_state()
-        dna_params = self.memory.get_dna_parameters()
-        recent_context = self.memory.get_recent_messages(limit=3)
+        current_state = snapshot['state']
+        dna_params = snapshot['dna']
+        recent_context = snapshot['recent']
         
         # PURE DATA ONLY - no guidance, no instructions, no examples
         pure_context = {
@@ -144,7 +257,7 @@ class ExperientialMiddleware:
             "personality_initiative": dna_params.get('dna_initiative_threshold', 0.6),
             
             # Session metrics (pure numbers)
-            "messages_count": self.memory.get_message_count(),
+            "messages_count": snapshot['count'],
             "topic_freshness": max(0, 1 - (behavior_context.get('topic_persistence', 0) / 8))
         }
         
@@ -152,10 +265,13 @@ class ExperientialMiddleware:
     
     def _get_raw_llm_response(self, user_message):
         """Get raw LLM response for comparison"""
-        debug_info = {}
+        debug_info = self.current_raw_debug
+        debug_info.clear()
         
         try:
-            raw_provider = LLMProviderFactory.create_provider(self.config.llm_config)
+            if self._raw_provider is None:
+                self._raw_provider = LLMProviderFactory.create_provider(self.config.llm_config)
+            raw_provider = self._raw_provider
             debug_info['raw_provider_created'] = True
             
             minimal_context = {
@@ -175,16 +291,14 @@ class ExperientialMiddleware:
                 result = str(raw_response)
                 
             debug_info['raw_response_preview'] = result[:100] + "..." if len(result) > 100 else result
-            self.current_raw_debug = debug_info
             return result
                 
         except Exception as e:
             debug_info['raw_call_success'] = False
             debug_info['raw_error'] = str(e)
-            self.current_raw_debug = debug_info
             return "[Raw response unavailable]"
     
-    def _update_pure_learning_systems(self, user_message, ai_response, behavior_context):
+    def _update_pure_learning_systems(self, user_message, ai_response, behavior_context, snapshot):
         """Pure learning without guidance interference"""
         
         # Extract feedback
@@ -208,138 +322,122 @@ class ExperientialMiddleware:
         })
         
         # Update current state
-        debug_info = {}
+        debug_info = self.current_debug_info
+        debug_info.clear()
         
         current_emotional_state = self.emotional.get_current_mood()
-        current_state = self.memory.get_current_state()
+        current_state = snapshot['state']
         
         # Update mood
         old_mood = current_state.get('st_current_mood')
         new_mood_value = current_emotional_state['primary_emotion']
         debug_info['mood_change'] = f"'{old_mood}' -> '{new_mood_value}'"
-        self.memory.update_current_state('st_current_mood', new_mood_value)
         
         # Update energy
         old_energy = current_state.get('st_conversation_energy')
         new_energy_value = current_emotional_state['energy_level']
         debug_info['energy_change'] = f"{old_energy} -> {new_energy_value}"
-        self.memory.update_current_state('st_conversation_energy', new_energy_value)
         
         # Standard state updates
-        message_count = self.memory.get_message_count()
-        self.memory.update_current_state('st_messages_count', message_count)
-        
+        message_count = snapshot['count']
         boredom_level = behavior_context.get('boredom_level', 0)
-        self.memory.update_current_state('st_boredom_level', boredom_level)
         
         # Engagement tracking
         engagement_level = current_emotional_state['engagement_level']
-        if engagement_level > 0.7:
-            engagement_trend = 'high'
-        elif engagement_level > 0.4:
-            engagement_trend = 'stable'
-        else:
-            engagement_trend = 'low'
+        engagement_trend = _ENGAGEMENT_LABELS[bisect_left(_ENGAGEMENT_THRESHOLDS, engagement_level)]
         
         debug_info['engagement_trend'] = f"{engagement_trend} (level={engagement_level})"
-        self.memory.update_current_state('st_engagement_trend', engagement_trend)
-        
-        # Update initiative tracking
-        self.memory.update_current_state('st_initiative_taken', initiative_taken)
         
-        # Store debug info
-        self.current_debug_info = debug_info
+        # All state updates of the turn (incl. initiative tracking) in one call
+        self.memory.update_current_state_bulk({
+            'st_current_mood': new_mood_value,
+            'st_conversation_energy': new_energy_value,
+            'st_messages_count': message_count,
+            'st_boredom_level': boredom_level,
+            'st_engagement_trend': engagement_trend,
+            'st_initiative_taken': initiative_taken
+        })
     
     def _log_pure_interaction(self, user_message, ai_response, context, raw_response, processed_llm_response):
         """Pure data logging"""
         
-        middleware_debug = getattr(self, 'current_debug_info', {})
-        raw_debug = getattr(self, 'current_raw_debug', {})
+        middleware_debug = self.current_debug_info
+        raw_debug = self.current_raw_debug
         
         # Response difference calculation
         difference_metrics = self._calculate_pure_response_difference(raw_response, ai_response.get('response_text', ''))
         
-        # Pure data log entry
-        log_entry = {
-            # Basic conversation data
+        # Per-turn strings computed once
+        processed_text = str(processed_llm_response)
+        word_count = len(ai_response.get('response_text', '').split())
+        
+        # Values that are not a plain lookup in one of the source dicts
+        turn = {
             'timestamp': datetime.now().isoformat(),
             'session_id': self.session_id,
             'user_message': user_message,
             'raw_llm_response': raw_response,
-            'processed_llm_response': str(processed_llm_response)[:500] + "..." if len(str(processed_llm_response)) > 500 else str(processed_llm_response),
-            'final_ai_response': ai_response.get('response_text', ''),
-            
-            # Pure emotional state
-            'mood_state': context.get('current_mood'),
-            'energy_level': context.get('energy_level', 0.5),
-            'engagement_level': ai_response.get('engagement_analysis', 0),
-            'curiosity_level': context.get('curiosity_level', 0.7),
-            'boredom_level': context.get('boredom_level', 0),
-            
-            # Behavioral metrics (no guidance)
-            'initiative_taken': ai_response.get('initiative_taken', False),
-            'topic_persistence': context.get('topic_persistence', 0),
-            'topic_freshness': context.get('topic_freshness', 1.0),
+            'processed_llm_response': processed_text[:500] + "..." if len(processed_text) > 500 else processed_text,
             'pure_data_approach': True,
-            
-            # Word count tracking
-            'response_word_count': len(ai_response.get('response_text', '').split()),
-            'word_limit_enforced': len(ai_response.get('response_text', '').split()) <= 60,
-            
-            # Debug information
-            'debug_raw_call_success': raw_debug.get('raw_call_success', False),
-            'debug_mood_change': middleware_debug.get('mood_change', ''),
-            'debug_energy_change': middleware_debug.get('energy_change', ''),
-            'debug_engagement_trend': middleware_debug.get('engagement_trend', ''),
-            
-            # Comparison metrics
-            'comparison_length_difference': difference_metrics.get('length_difference', 0),
-            'comparison_word_similarity': difference_metrics.get('word_similarity', 0),
-            'comparison_significant_change': difference_metrics.get('significant_change', False),
-            'natural_variety_score': difference_metrics.get('natural_variety', 0),
-            
-            # Context summary
+            'response_word_count': word_count,
+            'word_limit_enforced': word_count <= 60,
             'context_summary': {
                 'mood': context.get('current_mood'),
                 'energy': context.get('energy_level'),
                 'data_only': True
             }
         }
+        sources = {
+            'turn': turn,
+            'context': context,
+            'ai_response': ai_response,
+            'raw_debug': raw_debug,
+            'middleware_debug': middleware_debug,
+            'difference_metrics': difference_metrics
+        }
+        
+        # Pure data log entry, one walk over the field table
+        log_entry = {key: sources[source].get(source_key, default)
+                     for key, source, source_key, default in _LOG_FIELDS}
         
         self.memory.log_interaction(log_entry)
     
     def _calculate_pure_response_difference(self, raw_response, final_response):
-        """Calculate response differences with natural variety scoring"""
+        """Calculate response differences with natural variety scoring (empty without a raw response)"""
+        if raw_response is None:
+            return {}  # comparison skipped this turn - the log falls back to its defaults
         try:
-            raw_len = len(str(raw_response))
-            final_len = len(str(final_response))
+            raw_text = str(raw_response)
+            final_text = str(final_response)
+            raw_len = len(raw_text)
+            final_len = len(final_text)
             
-            raw_words = set(str(raw_response).lower().split())
-            final_words = set(str(final_response).lower().split())
+            # One lowercase + split per text; the final token list is reused for diversity below
+            final_lower = final_text.lower()
+            words = final_lower.split()
+            raw_words = set(raw_text.lower().split())
+            final_words = set(words)
             
-            # Basic similarity
+            # Basic similarity (|A | B| = |A| + |B| - |A & B|, no union set built)
             if raw_words and final_words:
-                overlap = len(raw_words.intersection(final_words))
-                union = len(raw_words.union(final_words))
+                overlap = len(final_words.intersection(raw_words))
+                union = len(raw_words) + len(final_words) - overlap
                 similarity = overlap / union if union > 0 else 0
             else:
                 similarity = 0
             
             # Natural variety scoring (no repetitive patterns)
-            final_lower = str(final_response).lower()
             natural_variety = 0
             
             # Check for absence of repetitive patterns
-            repetitive_patterns = ['wait', 'hold on', 'hold up', 'you know what']
-            pattern_found = any(pattern in final_lower for pattern in repetitive_patterns)
+            pattern_found = _REPETITIVE_RE.search(final_lower) is not None
             
             if not pattern_found:
                 natural_variety += 0.5
             
             # Lexical diversity
-            words = final_lower.split()
             if words:
-                unique_ratio = len(set(words)) / len(words)
+                unique_ratio = len(final_words) / len(words)
                 natural_variety += unique_ratio * 0.3
             
             # Natural conversation flow
@@ -356,6 +454,71 @@ class ExperientialMiddleware:
         except Exception as e:
             return {'error': str(e)}
 
-if __name__ == "__main__":
+def _uses_cuda(provider):
+    """True for a provider whose model lives on a CUDA device (GPT-2 on GPU)"""
+    return getattr(provider, 'device', None) == 'cuda' and not getattr(provider, 'use_mock', True)
+
+def run_zygote():
+    """Initialize once, then fork a child process per conversation (POSIX only)
+    
+    Children inherit the loaded provider (CPU model/tokenizer pages, API clients) and
+    engines copy-on-write, so only the first conversation pays the cold start. Each child
+    reloads the session state the previous one saved before talking.
+    
+    A CUDA context does not survive fork(): with GPT-2 on GPU every child's generate would
+    fail (and silently fall back to mock replies), so the conversation then runs in-process.
+    """
     middleware = ExperientialMiddleware()
-    middleware.run_conversation()
\ No newline at end of file
+    if middleware._raw_compare_every:
+        # The raw-comparison provider is otherwise built lazily - in every child
+        middleware._raw_provider = LLMProviderFactory.create_provider(middleware.config.llm_config)
+    
+    if _uses_cuda(middleware.llm_provider) or _uses_cuda(middleware._raw_provider):
+        print("⚠️ --zygote is not supported with the model on CUDA (CUDA cannot be used after fork); running a single conversation")
+        middleware.run_conversation()
+        return
+    
+    while True:
+        # Ctrl+C reaches the whole foreground group: the child handles it (and saves),
+        # the parent must not die inside waitpid while the child is still writing
+        sigint_handler = signal.signal(signal.SIGINT, signal.SIG_IGN)
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, sigint_handler)
+            exit_code = 0
+            try:
+                middleware.session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+                middleware.memory.load_session_state()
+                middleware.run_conversation()
+            except BaseException:
+                traceback.print_exc()
+                exit_code = 1
+            finally:
+                # os._exit skips interpreter shutdown, so flush stdio by hand
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(exit_code)
+        
+        try:
+            _, status = os.waitpid(pid, 0)
+        finally:
+            signal.signal(signal.SIGINT, sigint_handler)
+        exit_code = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+        if exit_code != 0:
+            print(f"\n⚠️ Conversation process exited with status {exit_code}")
+        try:
+            again = input("\n🔁 Start another conversation? (y/n): ").strip().lower()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if again not in ('y', 'yes'):
+            break
+
+if __name__ == "__main__":
+    zygote = '--zygote' in sys.argv[1:]
+    if zygote and not hasattr(os, 'fork'):
+        print("⚠️ --zygote needs os.fork (POSIX); running a single conversation")
+    if zygote and hasattr(os, 'fork'):
+        run_zygote()
+    else:
+        middleware = ExperientialMiddleware()
+        middleware.run_conversation()
\ No newline at end of file
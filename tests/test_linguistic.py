@@ -0,0 +1,63 @@
+# tests/test_linguistic.py - LinguisticEngine message parsing
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engines.linguistic import LinguisticEngine
+
+
+def _reference_engagement(message):
+    """Engagement estimate exactly as the original per-indicator loops computed it"""
+    words = len(message.split())
+    exclamations = message.count('!')
+    score = 0.5
+    if words > 15:
+        score += 0.25
+    elif words > 8:
+        score += 0.15
+    elif words < 2:
+        score -= 0.4
+    elif words < 4:
+        score -= 0.2
+    if '?' in message:
+        score += 0.2
+    if exclamations > 0:
+        score += 0.15
+    if exclamations > 2:
+        score += 0.1
+    if sum(1 for c in message if c.isupper()) / max(1, len(message)) > 0.3:
+        score += 0.15
+    lower = message.lower()
+    for indicator in ['love', 'hate', 'amazing', 'terrible', 'excited', 'upset', 'frustrated', 'happy', 'sad']:
+        if indicator in lower:
+            score += 0.1
+            break
+    for indicator in ['i feel', 'i think', 'my', 'me', 'personally']:
+        if indicator in lower:
+            score += 0.05
+    return max(0.1, min(0.9, score))
+
+
+class EngagementEstimateTest(unittest.TestCase):
+    def test_matches_reference_floats_exactly(self):
+        engine = LinguisticEngine()
+        messages = [
+            'i personally me ok amazing',
+            'dog think sad i i i memy',
+            'I feel like my day was great, I think?',
+            'personally, me and my friends LOVE this!!!',
+            'ok',
+            '',
+        ]
+        for message in messages:
+            with self.subTest(message=message):
+                # assertEqual, not assertAlmostEqual: 0.7 vs 0.7000000000000001
+                # decides the energy branch in EmotionalEngine
+                self.assertEqual(engine.parse_user_message(message)['estimated_engagement'],
+                                 _reference_engagement(message))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+# tests/test_memory.py - MemoryManager storage behavior
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openpyxl import load_workbook
+from openpyxl.workbook.workbook import Workbook
+
+from engines.memory import MemoryManager, SQLiteMemoryManager, _CHAT_FLUSH_EVERY
+
+
+class ExcelRetryTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.excel_file = os.path.join(self._tmp.name, 'memory.xlsx')
+        with mock.patch('builtins.print'):
+            self.memory = MemoryManager(self.excel_file)
+            self.memory.load_session_state()
+    
+    def tearDown(self):
+        self._tmp.cleanup()
+    
+    def _chat_log_rows(self):
+        wb = load_workbook(self.excel_file, read_only=True)
+        try:
+            return len(list(wb['Chat_Log'].iter_rows(values_only=True))) - 1  # minus header
+        finally:
+            wb.close()
+    
+    def _log(self, count, start=0):
+        for i in range(start, start + count):
+            self.memory.log_interaction({'timestamp': f't{i}', 'user_message': f'u{i}'})
+    
+    def test_failed_save_does_not_duplicate_chat_rows(self):
+        real_save = Workbook.save
+        calls = []
+        
+        def save_failing_once(wb, filename):
+            calls.append(filename)
+            if len(calls) == 1:
+                raise OSError("disk full")
+            return real_save(wb, filename)
+        
+        with mock.patch.object(Workbook, 'save', save_failing_once), mock.patch('builtins.print'):
+            self._log(_CHAT_FLUSH_EVERY)           # first batch: save fails, rows kept for retry
+            self.memory.flush_chat_log()
+            self._log(_CHAT_FLUSH_EVERY, _CHAT_FLUSH_EVERY)  # second batch retries the first
+            self.memory.flush_chat_log()
+        
+        self.assertEqual(self._chat_log_rows(), 2 * _CHAT_FLUSH_EVERY)
+    
+    def test_failed_session_save_does_not_duplicate_chat_rows(self):
+        real_save = Workbook.save
+        calls = []
+        
+        def save_failing_once(wb, filename):
+            calls.append(filename)
+            if len(calls) == 1:
+                raise OSError("disk full")
+            return real_save(wb, filename)
+        
+        with mock.patch.object(Workbook, 'save', save_failing_once), mock.patch('builtins.print'):
+            self._log(3)
+            self.memory.save_session_state()  # fails, rows stay pending
+            self.memory.save_session_state()
+        
+        self.assertEqual(self._chat_log_rows(), 3)
+        wb = load_workbook(self.excel_file, read_only=True)
+        try:
+            self.assertEqual(wb.sheetnames, ['DNA', 'Current_State', 'Experience', 'Chat_Log'])
+        finally:
+            wb.close()
+
+
+class SQLiteRoundTripTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_file = os.path.join(self._tmp.name, 'memory.db')
+    
+    def tearDown(self):
+        self._tmp.cleanup()
+    
+    def _open(self):
+        with mock.patch('builtins.print'):
+            memory = SQLiteMemoryManager(self.db_file)
+            memory.load_session_state()
+        return memory
+    
+    def test_initial_state_keeps_value_types(self):
+        state = self._open().get_current_state()
+        self.assertIs(state['st_initiative_taken'], False)
+        self.assertEqual(state['st_current_mood'], 'neutral')
+        self.assertEqual(state['st_conversation_energy'], 0.5)
+        self.assertIsInstance(state['st_messages_count'], int)
+    
+    def test_saved_state_and_experience_keep_value_types(self):
+        memory = self._open()
+        memory.update_current_state_bulk({'st_initiative_taken': True, 'st_messages_count': 4,
+                                          'st_current_mood': 'curious'})
+        memory.update_experiential_learning({'engagement_score': 0.9, 'initiative_taken': True})
+        memory.log_interaction({'timestamp': 't0', 'user_message': 'hi'})
+        with mock.patch('builtins.print'):
+            memory.save_session_state()
+        
+        reloaded = self._open()
+        state = reloaded.get_current_state()
+        self.assertIs(state['st_initiative_taken'], True)
+        self.assertEqual(state['st_messages_count'], 4)
+        self.assertEqual(state['st_current_mood'], 'curious')
+        self.assertEqual(reloaded.experiential_memory['pattern.positive_response']['value'], 1)
+        self.assertAlmostEqual(reloaded.experiential_memory['engagement.score']['value'], 0.58)
+        self.assertEqual(reloaded.get_message_count(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()